@@ -0,0 +1,9 @@
+# benchmarks/
+# Event-scale performance checks, run from the repository root:
+#
+#     python -m benchmarks.run --entries 500 --repeat 30 --output results.json
+#     python -m benchmarks.load --levels 1,5,10,25,50 --output load.json
+#
+# generate.py builds a synthetic event in a scratch copy of the database, run.py times the
+# routes against it through the Flask test client and load.py runs simulated officials
+# against a locally launched server.
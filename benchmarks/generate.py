@@ -0,0 +1,140 @@
+import os
+import random
+import shutil
+from datetime import date, time
+from app import create_app
+from auth import hash_password
+from models import (db, ChecklistSyncEdit, Entry, EntryStatus, InspectionChecklist, InspectionItem,
+                    InspectionItemChange, ItemKind, User, natural_sort_key)
+from checklists import create_checklists, entry_classes
+from status import rebuild_entry_status
+from search import rebuild_search_index
+
+# The committed event database, copied for its checklist templates, classes, roles and officials
+SOURCE_DATABASE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'DataBase', 'racing.db')
+
+# Admin account the benchmark logs in as
+BENCH_USERNAME = 'bench'
+BENCH_PASSWORD = 'bench'
+
+# Share of result items per status once a car has been inspected
+ITEM_STATUS_WEIGHTS = {'Pass': 70, 'Pending': 15, 'NA': 10, 'Fail': 5}
+APPROVAL_STATUS_WEIGHTS = {'Pass': 75, 'Pending': 20, 'Fail': 5}
+
+MAKES = {
+    'Nissan': ['Skyline GT-R', 'Silvia S15', '180SX', '350Z'],
+    'Mitsubishi': ['Lancer Evo IX', 'Lancer Evo VI', 'Mirage'],
+    'Subaru': ['WRX STI', 'BRZ', 'Impreza'],
+    'Honda': ['Civic Type R', 'S2000', 'Integra'],
+    'Mazda': ['RX-7', 'MX-5', 'RX-8'],
+    'Toyota': ['GR86', 'Supra', 'Corolla AE86'],
+    'Porsche': ['911 GT3', 'Cayman GT4'],
+}
+FIRST_NAMES = ['Alex', 'Sam', 'Jordan', 'Taylor', 'Chris', 'Jamie', 'Morgan', 'Riley', 'Casey', 'Drew',
+               'Kenji', 'Hiro', 'Mei', 'Liam', 'Noah', 'Olivia', 'Mia', 'Lucas', 'Zoe', 'Ethan']
+LAST_NAMES = ['Smith', 'Nguyen', 'Brown', 'Wilson', 'Tanaka', 'Kurokawa', 'Taylor', 'Martin', 'Lee', 'Walker',
+              'Harris', 'Clarke', 'Young', 'King', 'Wright', 'Scott', 'Green', 'Baker', 'Adams', 'Hill']
+
+# Rows per bulk INSERT / UPDATE
+CHUNK_SIZE = 500
+
+
+def _weighted(rng, weights):
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+
+def _entry_rows(rng, count, classes):
+    # Unique vehicle numbers with the occasional suffix, e.g. 12, 12A, 7PA
+    for number in range(1, count + 1):
+        suffix = rng.choice(['', '', '', 'A', 'PA'])
+        vehicle_number = f"{number}{suffix}" if len(f"{number}{suffix}") <= 5 else str(number)
+        garage_number = f"G{rng.randint(1, max(count // 3, 1))}" if rng.random() < 0.9 else None
+        make = rng.choice(list(MAKES))
+        yield {
+            'vehicle_number': vehicle_number,
+            'vehicle_make': make,
+            'vehicle_model': rng.choice(MAKES[make]),
+            'vehicle_type': 'W',
+            'driver_name': f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            'team_name': f"{rng.choice(LAST_NAMES)} Racing" if rng.random() < 0.4 else None,
+            'class_type': rng.choice(classes),
+            'garage_number': garage_number,
+            'licence_number': f"{rng.randint(100000, 999999)}",
+            'power_kw': round(rng.uniform(150, 600)) if rng.random() < 0.8 else None,
+            'vehicle_sort_key': natural_sort_key(vehicle_number),
+            'garage_sort_key': natural_sort_key(garage_number),
+        }
+
+
+def _item_values(rng, kind):
+    # Inspection results and recorded data for one item of an inspected car
+    if kind == ItemKind.STATUS:
+        return {'status': _weighted(rng, ITEM_STATUS_WEIGHTS)}
+    if kind == ItemKind.APPROVAL:
+        return {'status': _weighted(rng, APPROVAL_STATUS_WEIGHTS)}
+    if kind == ItemKind.WEIGHT:
+        return {'value': str(round(rng.gauss(1250, 150)))} if rng.random() < 0.85 else {}
+    if kind == ItemKind.DATE:
+        return {'value': date.today().isoformat()}
+    if kind == ItemKind.TIME:
+        return {'value': time(rng.randint(7, 17), rng.randint(0, 59)).isoformat()}
+    return {}
+
+
+def generate_event(database_path, entries=300, presented=0.8, seed=1):
+    """
+    Write a synthetic event of the given number of entries to database_path, a copy of the
+    committed database with its event data replaced. A presented share of the entries get a
+    checklist built from the real templates, with a random mix of results and weights.
+    Returns the app bound to the new database and a summary of what was generated.
+    """
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(database_path + suffix):
+            os.remove(database_path + suffix)
+    shutil.copyfile(SOURCE_DATABASE, database_path)
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{os.path.abspath(database_path)}'})
+    rng = random.Random(seed)
+
+    with app.app_context():
+        for model in (InspectionItemChange, ChecklistSyncEdit, InspectionItem, InspectionChecklist, EntryStatus, Entry):
+            db.session.execute(db.delete(model))
+        if not User.query.filter_by(username=BENCH_USERNAME).first():
+            db.session.add(User(username=BENCH_USERNAME, password=hash_password(BENCH_PASSWORD), role='admin'))
+        db.session.commit()
+
+        classes = [code for code, name in entry_classes()]
+        rows = list(_entry_rows(rng, entries, classes))
+        for start in range(0, len(rows), CHUNK_SIZE):
+            db.session.execute(db.insert(Entry), rows[start:start + CHUNK_SIZE])
+        db.session.commit()
+
+        inspected = db.session.query(Entry.id, Entry.class_type).all()
+        inspected = rng.sample(inspected, round(len(inspected) * presented))
+        for start in range(0, len(inspected), CHUNK_SIZE):
+            create_checklists(inspected[start:start + CHUNK_SIZE])
+            db.session.commit()
+
+        updates = []
+        approvals = []
+        for item in db.session.query(InspectionItem.id, InspectionItem.kind, InspectionItem.checklist_id):
+            values = _item_values(rng, item.kind)
+            if values:
+                updates.append(dict(values, id=item.id))
+            if item.kind == ItemKind.APPROVAL:
+                # The checklist flag follows its "Approved to Start" item, as a checklist save sets it
+                approvals.append({'id': item.checklist_id, 'approved_to_start': values.get('status') == 'Pass'})
+        for start in range(0, len(updates), CHUNK_SIZE):
+            db.session.execute(db.update(InspectionItem), updates[start:start + CHUNK_SIZE])
+        for start in range(0, len(approvals), CHUNK_SIZE):
+            db.session.execute(db.update(InspectionChecklist), approvals[start:start + CHUNK_SIZE])
+        db.session.commit()
+
+        rebuild_entry_status()
+        rebuild_search_index()
+        summary = {
+            'entries': entries,
+            'checklists': db.session.query(InspectionChecklist.id).count(),
+            'items': db.session.query(InspectionItem.id).count(),
+            'classes': len(classes),
+        }
+    return app, summary
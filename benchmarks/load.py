@@ -0,0 +1,346 @@
+# benchmarks/load.py
+# Simulated scrutineers against a locally launched server, at increasing concurrency:
+#
+#     python -m benchmarks.load [--levels 1,5,10,25,50] [--duration 30] [--server dev|gunicorn] [--output load.json]
+#
+# Each simulated official logs in through /login, then until the level's time is up searches
+# for a car, opens its checklist, saves a result and polls the dashboard counters, in the
+# ratios of OFFICIAL_ACTIONS with a random pause in between. Every level reports throughput,
+# error rates (counting "database is locked" in the server log) and latency percentiles.
+import argparse
+import http.client
+import json
+import os
+import random
+import re
+import shutil
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from http.cookies import SimpleCookie
+from urllib.parse import urlencode
+from checklists import ITEM_STATUSES, UNCHANGED_MARKER
+from models import db
+from benchmarks.generate import BENCH_PASSWORD, BENCH_USERNAME, generate_event
+from benchmarks.run import SEARCH_TERMS, percentile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Relative frequency of each action in an official's session
+OFFICIAL_ACTIONS = {'lookup': 30, 'view_checklist': 25, 'save_checklist': 15, 'dashboard': 30}
+
+# Server log line written when SQLite gives up waiting for the write lock
+LOCKED_MESSAGE = 'database is locked'
+
+# Seconds to wait for the server to start answering
+SERVER_START_TIMEOUT = 60
+
+
+class Official(threading.Thread):
+    """
+    One simulated scrutineer with their own connection and login session. Records
+    (action, seconds, outcome) for every request made while the level is running, where
+    outcome is 'ok', 'conflict' (someone else saved the checklist first) or an error kind.
+    """
+
+    def __init__(self, port, checklist_ids, think, timeout, start_barrier, stop, seed):
+        super().__init__(daemon=True)
+        self.port = port
+        self.checklist_ids = checklist_ids
+        self.think = think
+        self.timeout = timeout
+        self.start_barrier = start_barrier
+        self.stop = stop
+        self.rng = random.Random(seed)
+        self.cookies = {}
+        self.connection = None
+        self.checklist = None  # (checklist_id, version, item IDs) of the last checklist opened
+        self.login_seconds = None
+        self.samples = []
+
+    def request(self, method, path, form=None, headers=None):
+        # (status, headers, body) over a kept-alive connection, reconnecting after a failure
+        headers = dict(headers or {})
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f'{name}={value}' for name, value in self.cookies.items())
+        body = None
+        if form is not None:
+            body = urlencode(form)
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        # A kept-alive connection the server has since closed is retried once on a new one,
+        # as browsers do, rather than counted as an error
+        for retry in (self.connection is not None, False):
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection('127.0.0.1', self.port, timeout=self.timeout)
+            try:
+                self.connection.request(method, path, body=body, headers=headers)
+                response = self.connection.getresponse()
+                data = response.read()
+                break
+            except Exception as e:
+                self.connection.close()
+                self.connection = None
+                if not (retry and isinstance(e, (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError))):
+                    raise
+        for header in response.headers.get_all('Set-Cookie') or []:
+            for name, morsel in SimpleCookie(header).items():
+                self.cookies[name] = morsel.value
+        return response.status, response.headers, data
+
+    def timed(self, action, method, path, form=None, headers=None):
+        # Send one request and record how long it took and how it went
+        started = time.perf_counter()
+        try:
+            status, headers, body = self.request(method, path, form, headers)
+        except socket.timeout:
+            status, headers, body, outcome = None, {}, b'', 'timeout'
+        except (OSError, http.client.HTTPException):
+            status, headers, body, outcome = None, {}, b'', 'connection'
+        else:
+            outcome = 'ok' if status < 400 else 'conflict' if status == 409 else f'http_{status}'
+            if action == 'save_checklist' and status == 302 and 'view_checklist' in headers.get('Location', ''):
+                outcome = 'save_failed'  # The page redirects back to the checklist when the save raised
+        if not self.stop.is_set():
+            self.samples.append((action, time.perf_counter() - started, outcome))
+        return status, body
+
+    def log_in(self):
+        started = time.perf_counter()
+        try:
+            status, headers, _ = self.request('POST', '/login', {'username': BENCH_USERNAME, 'password': BENCH_PASSWORD})
+            if status == 302 and not headers.get('Location', '').endswith('/login'):  # Bad logins go back to /login
+                self.login_seconds = time.perf_counter() - started
+        except (OSError, http.client.HTTPException):
+            pass
+
+    def lookup(self):
+        self.timed('lookup', 'GET', '/lookup_entry?' + urlencode({'search_query': self.rng.choice(SEARCH_TERMS)}))
+
+    def view_checklist(self):
+        checklist_id = self.rng.choice(self.checklist_ids)
+        status, body = self.timed('view_checklist', 'GET', f'/view_checklist?checklist_id={checklist_id}')
+        if status == 200:
+            page = body.decode('utf-8', 'replace')
+            version = re.search(r'name="version" value="(\d+)"', page)
+            item_ids = re.findall(r'name="status_(\d+)"', page)
+            if version and item_ids:
+                self.checklist = (checklist_id, version.group(1), item_ids)
+
+    def save_checklist(self):
+        if self.checklist is None:
+            return self.view_checklist()  # Nothing open yet, an official opens a checklist before saving
+        checklist_id, version, item_ids = self.checklist
+        form = {'checklist_id': checklist_id, 'version': version, 'omitted': UNCHANGED_MARKER}
+        for item_id in self.rng.sample(item_ids, min(3, len(item_ids))):
+            form[f'status_{item_id}'] = self.rng.choice(ITEM_STATUSES)
+        # Ask for JSON so a conflicting save answers 409 rather than a redirect with a message
+        self.timed('save_checklist', 'POST', '/update_checklist', form, {'Accept': 'application/json'})
+        self.checklist = None  # Reopen before saving again, like the page does after a save
+
+    def dashboard(self):
+        self.timed('dashboard', 'GET', '/dashboard_stats')
+
+    def run(self):
+        self.log_in()
+        self.start_barrier.wait()
+        actions, weights = list(OFFICIAL_ACTIONS), list(OFFICIAL_ACTIONS.values())
+        while not self.stop.is_set():
+            getattr(self, self.rng.choices(actions, weights)[0])()
+            if self.think:
+                self.stop.wait(self.rng.expovariate(1 / self.think))
+        if self.connection:
+            self.connection.close()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(database_path, port, log, server='dev', workers=2, threads=8):
+    """
+    Launch the app on 127.0.0.1:port against database_path, with the development server or
+    gunicorn (gunicorn.conf.py, with the given worker processes and threads). Returns the process
+    once it answers requests.
+    """
+    env = dict(os.environ, DATABASE_URL=f'sqlite:///{os.path.abspath(database_path)}', FLASK_DEBUG='0',
+               PORT=str(port), WEB_CONCURRENCY=str(workers), GUNICORN_THREADS=str(threads), PYTHONUNBUFFERED='1')
+    if server == 'gunicorn':
+        command = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--bind', f'127.0.0.1:{port}',
+                   '--access-logfile', '/dev/null', 'wsgi:app']
+    else:
+        command = [sys.executable, '-m', 'flask', '--app', 'wsgi', 'run', '--host', '127.0.0.1', '--port', str(port),
+                   '--with-threads', '--no-reload']
+    process = subprocess.Popen(command, cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+    deadline = time.monotonic() + SERVER_START_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"The {server} server exited with code {process.returncode}, see {log.name}")
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            connection.request('GET', '/login')
+            connection.getresponse().read()
+            connection.close()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise SystemExit(f"The {server} server didn't answer within {SERVER_START_TIMEOUT}s, see {log.name}")
+
+
+def stop_server(process):
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def latency_summary(seconds):
+    if not seconds:
+        return {'p50_ms': None, 'p95_ms': None, 'p99_ms': None, 'max_ms': None}
+    milliseconds = [value * 1000 for value in seconds]
+    return {
+        'p50_ms': round(percentile(milliseconds, 50), 2),
+        'p95_ms': round(percentile(milliseconds, 95), 2),
+        'p99_ms': round(percentile(milliseconds, 99), 2),
+        'max_ms': round(max(milliseconds), 2),
+    }
+
+
+def run_level(port, officials, duration, checklist_ids, think, timeout, log_path, seed):
+    """
+    Run the given number of simulated officials for duration seconds after they have all
+    logged in, and summarise their requests and the server log lines written meanwhile.
+    """
+    log_offset = os.path.getsize(log_path)
+    start_barrier = threading.Barrier(officials + 1)
+    stop = threading.Event()
+    threads = [Official(port, checklist_ids, think, timeout, start_barrier, stop, seed * 1000 + n) for n in range(officials)]
+    for thread in threads:
+        thread.start()
+    start_barrier.wait()
+    started = time.perf_counter()
+    stop.wait(duration)
+    stop.set()
+    elapsed = time.perf_counter() - started
+    for thread in threads:
+        thread.join(timeout + 5)
+
+    with open(log_path, errors='replace') as log:
+        log.seek(log_offset)
+        locked = log.read().count(LOCKED_MESSAGE)
+    samples = [sample for thread in threads for sample in thread.samples]
+    errors = {}
+    for _, _, outcome in samples:
+        if outcome not in ('ok', 'conflict'):
+            errors[outcome] = errors.get(outcome, 0) + 1
+    logins = [thread.login_seconds for thread in threads if thread.login_seconds is not None]
+    return {
+        'officials': officials,
+        'seconds': round(elapsed, 2),
+        'requests': len(samples),
+        'throughput_rps': round(len(samples) / elapsed, 2),
+        'errors': sum(errors.values()),
+        'error_rate': round(sum(errors.values()) / len(samples), 4) if samples else None,
+        'errors_by_kind': errors,
+        'database_locked': locked,
+        'conflicts': sum(outcome == 'conflict' for _, _, outcome in samples),
+        'failed_logins': officials - len(logins),
+        'login': latency_summary(logins),
+        'latency': latency_summary([seconds for _, seconds, _ in samples]),
+        'actions': {
+            action: dict(latency_summary([seconds for name, seconds, _ in samples if name == action]),
+                         requests=sum(name == action for name, _, _ in samples))
+            for action in OFFICIAL_ACTIONS
+        },
+    }
+
+
+def print_level(result):
+    latency = result['latency']
+    print(f"{result['officials']:9d} {result['requests']:9d} {result['throughput_rps']:8.1f} "
+          f"{(result['error_rate'] or 0) * 100:7.2f}% {result['database_locked']:7d} {result['conflicts']:9d} "
+          f"{latency['p50_ms'] or 0:9.1f} {latency['p95_ms'] or 0:9.1f} {latency['p99_ms'] or 0:9.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulated scrutineers against a local server, at increasing concurrency.")
+    parser.add_argument('--levels', default='1,5,10,25,50', help="Comma separated numbers of simultaneous officials.")
+    parser.add_argument('--duration', type=float, default=30, help="Seconds to run each level for.")
+    parser.add_argument('--think', type=float, default=1.0, help="Mean pause between an official's requests, in seconds (0 for none).")
+    parser.add_argument('--timeout', type=float, default=30, help="Seconds before a request counts as timed out.")
+    parser.add_argument('--server', choices=['dev', 'gunicorn'], default='dev', help="Server to launch.")
+    parser.add_argument('--workers', type=int, default=2, help="gunicorn worker processes.")
+    parser.add_argument('--threads', type=int, default=8, help="gunicorn threads per worker.")
+    parser.add_argument('--entries', type=int, default=300, help="Entries in the generated event.")
+    parser.add_argument('--seed', type=int, default=1, help="Random seed for the event and the officials.")
+    parser.add_argument('--database', help="Scratch database path (default: a temporary file, removed afterwards).")
+    parser.add_argument('--keep', action='store_true', help="Keep the temporary scratch database and server log.")
+    parser.add_argument('--output', help="Write the results as JSON to this file.")
+    args = parser.parse_args(argv)
+    levels = [int(level) for level in args.levels.split(',') if level.strip()]
+
+    workdir = tempfile.mkdtemp(prefix='racing-load-')
+    log_path = os.path.join(workdir, 'server.log')
+    failed = True
+    try:
+        failed = _run(args, levels, workdir, log_path)
+    finally:
+        if failed:
+            print(f"Run failed, server log in {log_path}")
+        if args.keep or args.database or failed:
+            print(f"Kept {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return 1 if failed else 0
+
+
+def _run(args, levels, workdir, log_path):
+    # Generate the event, run every level and write the report; returns whether any request failed
+    scratch = args.database or os.path.join(workdir, 'load.db')
+    app, event_summary = generate_event(scratch, entries=args.entries, seed=args.seed)
+    with app.app_context():
+        db.engine.dispose()
+    with sqlite3.connect(scratch) as connection:
+        checklist_ids = [row[0] for row in connection.execute("SELECT id FROM inspection_checklists ORDER BY id")]
+    print(f"Generated {event_summary['entries']} entries and {event_summary['checklists']} checklists ({scratch})")
+
+    port = free_port()
+    results = []
+    with open(log_path, 'w') as log:
+        server = start_server(scratch, port, log, args.server, args.workers, args.threads)
+        print(f"Started the {args.server} server on port {port}, log in {log_path}")
+        print(f"{'officials':>9} {'requests':>9} {'req/s':>8} {'errors':>8} {'locked':>7} {'conflicts':>9} "
+              f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+        try:
+            for officials in levels:
+                result = run_level(port, officials, args.duration, checklist_ids, args.think, args.timeout, log_path, args.seed)
+                results.append(result)
+                print_level(result)
+        finally:
+            stop_server(server)
+
+    if args.output:
+        report = {
+            'meta': dict(event_summary, seed=args.seed, server=args.server, workers=args.workers if args.server == 'gunicorn' else 1,
+                         threads=args.threads if args.server == 'gunicorn' else None, duration=args.duration,
+                         think=args.think, actions=OFFICIAL_ACTIONS, timestamp=datetime.now().isoformat(timespec='seconds')),
+            'levels': results,
+        }
+        with open(args.output, 'w') as output:
+            json.dump(report, output, indent=2)
+        print(f"Wrote {args.output}")
+    return any(result['errors'] for result in results)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,199 @@
+# benchmarks/run.py
+# Time the app's pages and endpoints against a generated event:
+#
+#     python -m benchmarks.run [--entries 300] [--repeat 20] [--cold] [--output results.json]
+#
+# Every route is requested --repeat times through the Flask test client, recording the
+# latency and the number of SQL statements of each request. Results are printed as a table
+# and written as JSON for comparing runs.
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime
+from importlib.metadata import version
+from sqlalchemy import event
+from models import db, InspectionChecklist, InspectionItem, ItemKind
+from cache import report_cache
+from checklists import UNCHANGED_MARKER
+from commands import QUERY_PLAN_ROUTES
+from benchmarks.generate import BENCH_PASSWORD, BENCH_USERNAME, generate_event
+
+# Lookup terms, cycled through so repeated requests aren't all the same search
+SEARCH_TERMS = ['1', '12', 'nissan', 'smith', 'evo', 'G4', 'kenji tanaka', 'skylin', 'pro', 'porsche 911']
+
+
+def percentile(values, percent):
+    # Nearest-rank percentile of a non-empty list
+    ordered = sorted(values)
+    return ordered[max(round(percent / 100 * len(ordered) + 0.5) - 1, 0) if percent < 100 else -1]
+
+
+def benchmark_requests(app):
+    """
+    (name, method, path, request function, setup function or None) for every route timed.
+    The request functions take the logged in test client and the repetition number, or what
+    the setup function returned for it. Setup runs before the timer starts, so its queries
+    aren't counted against the route.
+    """
+    with app.app_context():
+        checklist_ids = [row.id for row in db.session.query(InspectionChecklist.id).order_by(InspectionChecklist.id)]
+        entry_ids = [row.entry_id for row in db.session.query(InspectionChecklist.entry_id).order_by(InspectionChecklist.id)]
+    if not checklist_ids:
+        raise SystemExit("The generated event has no checklists, use a --presented share above 0.")
+
+    def lookup(path, parameter):
+        return lambda client, n: client.get(path, query_string={parameter: SEARCH_TERMS[n % len(SEARCH_TERMS)]})
+
+    def view_checklist(path):
+        return lambda client, n: client.get(path, query_string={'checklist_id': checklist_ids[n % len(checklist_ids)]})
+
+    def present(path):
+        return lambda client, n: client.post(path, data={'entry_id': entry_ids[n % len(entry_ids)]})
+
+    def save_form(n):
+        # Flip one result item between Pass and Fail, a dirty-only save like the checklist page sends
+        checklist_id = checklist_ids[n % len(checklist_ids)]
+        with app.app_context():
+            version = db.session.get(InspectionChecklist, checklist_id).version
+            item = db.session.query(InspectionItem.id, InspectionItem.status) \
+                .filter(InspectionItem.checklist_id == checklist_id, InspectionItem.kind == ItemKind.STATUS).first()
+        data = {'checklist_id': checklist_id, 'version': version, 'omitted': UNCHANGED_MARKER}
+        if item:
+            data[f'status_{item.id}'] = 'Fail' if item.status == 'Pass' else 'Pass'
+        return data
+
+    requests = [
+        ('home', 'GET', '/', lambda client, n: client.get('/'), None),
+        ('add_entry_form', 'GET', '/add_entry', lambda client, n: client.get('/add_entry'), None),
+        ('lookup_entry', 'GET', '/lookup_entry?search_query=', lookup('/lookup_entry', 'search_query'), None),
+        ('lookup_entry2', 'GET', '/lookup_entry2?search_query=', lookup('/lookup_entry2', 'search_query'), None),
+        ('api_search', 'GET', '/api/entries/search?q=', lookup('/api/entries/search', 'q'), None),
+        ('view_checklist', 'GET', '/view_checklist?checklist_id=', view_checklist('/view_checklist'), None),
+        ('view_checklist2', 'GET', '/view_checklist2?checklist_id=', view_checklist('/view_checklist2'), None),
+        ('present_checklist', 'POST', '/view_checklist', present('/view_checklist'), None),
+        ('save_checklist', 'POST', '/update_checklist', lambda client, data: client.post('/update_checklist', data=data), save_form),
+    ]
+    requests += [(path.lstrip('/'), 'GET', path, lambda client, n, path=path: client.get(path), None) for path in QUERY_PLAN_ROUTES]
+    return requests
+
+
+def run_benchmark(app, repeat=20, cold=False):
+    """
+    Time each benchmark request repeat times, after one untimed warm-up request.
+    With cold, the report and search caches are emptied before every request, so each one
+    runs its queries; otherwise cached reports are served as they would be between writes.
+    Returns a result dict per route.
+    """
+    if cold:
+        app.config['SEARCH_CACHE_SECONDS'] = 0
+    client = app.test_client()
+    response = client.post('/login', data={'username': BENCH_USERNAME, 'password': BENCH_PASSWORD})
+    if response.status_code != 302:
+        raise SystemExit(f"Could not log in as {BENCH_USERNAME} (HTTP {response.status_code}).")
+
+    statements = []
+    with app.app_context():
+        engine = db.engine
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    results = []
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        for name, method, path, send, setup in benchmark_requests(app):
+            timings, query_counts, statuses = [], [], set()
+            for n in range(repeat + 1):
+                if cold:
+                    with app.app_context():
+                        report_cache().clear()
+                argument = setup(n) if setup else n
+                statements.clear()
+                started = time.perf_counter()
+                response = send(client, argument)
+                response.get_data()  # Run streamed responses to the end
+                elapsed = time.perf_counter() - started
+                if n == 0:
+                    continue  # Warm-up: templates compiled, caches and connections filled
+                timings.append(elapsed * 1000)
+                query_counts.append(len(statements))
+                statuses.add(response.status_code)
+            results.append({
+                'name': name,
+                'method': method,
+                'path': path,
+                'status': sorted(statuses),
+                'requests': repeat,
+                'p50_ms': round(percentile(timings, 50), 3),
+                'p95_ms': round(percentile(timings, 95), 3),
+                'mean_ms': round(sum(timings) / len(timings), 3),
+                'max_ms': round(max(timings), 3),
+                'queries_p50': percentile(query_counts, 50),
+                'queries_max': max(query_counts),
+            })
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+    return results
+
+
+def print_results(results):
+    print(f"{'route':44} {'status':>7} {'p50 ms':>9} {'p95 ms':>9} {'queries':>8}")
+    for result in results:
+        status = ','.join(str(code) for code in result['status'])
+        print(f"{result['method'] + ' ' + result['name']:44} {status:>7} {result['p50_ms']:9.2f} {result['p95_ms']:9.2f} "
+              f"{result['queries_p50']:4d}/{result['queries_max']:<3d}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time every route against a generated event.")
+    parser.add_argument('--entries', type=int, default=300, help="Entries in the generated event.")
+    parser.add_argument('--presented', type=float, default=0.8, help="Share of entries with a checklist.")
+    parser.add_argument('--repeat', type=int, default=20, help="Timed requests per route.")
+    parser.add_argument('--seed', type=int, default=1, help="Random seed for the generated event.")
+    parser.add_argument('--cold', action='store_true', help="Empty the report and search caches before every request.")
+    parser.add_argument('--database', help="Scratch database path (default: a temporary file, removed afterwards).")
+    parser.add_argument('--output', help="Write the results as JSON to this file.")
+    args = parser.parse_args(argv)
+
+    scratch = args.database or os.path.join(tempfile.mkdtemp(prefix='racing-bench-'), 'bench.db')
+    started = time.perf_counter()
+    app, event_summary = generate_event(scratch, entries=args.entries, presented=args.presented, seed=args.seed)
+    print(f"Generated {event_summary['entries']} entries, {event_summary['checklists']} checklists and "
+          f"{event_summary['items']} items in {time.perf_counter() - started:.1f}s ({scratch})")
+
+    try:
+        results = run_benchmark(app, repeat=args.repeat, cold=args.cold)
+    finally:
+        with app.app_context():
+            db.engine.dispose()
+        if not args.database:
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(scratch + suffix):
+                    os.remove(scratch + suffix)
+            os.rmdir(os.path.dirname(scratch))
+    print_results(results)
+
+    if args.output:
+        report = {
+            'meta': dict(event_summary, presented=args.presented, seed=args.seed, repeat=args.repeat, cold=args.cold,
+                         timestamp=datetime.now().isoformat(timespec='seconds'), python=platform.python_version(),
+                         flask=version('flask'), sqlalchemy=version('sqlalchemy'), sqlite=sqlite3.sqlite_version),
+            'results': results,
+        }
+        with open(args.output, 'w') as output:
+            json.dump(report, output, indent=2)
+        print(f"Wrote {args.output}")
+    failed = [result['name'] for result in results if any(code >= 400 for code in result['status'])]
+    if failed:
+        print(f"Error responses from: {', '.join(failed)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
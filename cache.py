@@ -0,0 +1,237 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import current_app, g, has_app_context, make_response, request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from models import db, AppMeta
+
+DATA_VERSION_KEY = 'data_version'
+TEMPLATE_VERSION_KEY = 'template_version'
+
+# Identifies the deployed code in report ETags, so a deploy doesn't leave browsers on old pages.
+# Heroku sets SOURCE_VERSION; otherwise the start time of the (preloaded) server process.
+BUILD_ID = os.getenv('SOURCE_VERSION', '')[:12] or format(int(time.time()), 'x')
+
+
+# Tables no cached report reads: commits that only write these leave the data version alone
+UNVERSIONED_TABLES = {'users', 'app_meta', 'schema_migrations', 'checklist_sync_edits'}
+
+
+def data_version():
+    """
+    The current data version, read once per request. Every committed write to a table the
+    reports read bumps it. With a shared report cache the version is read from there, so a
+    request served from the cache doesn't touch the database at all.
+    """
+    if 'data_version' not in g:
+        cache = report_cache()
+        version = cache.get_version()
+        if version is None:
+            version = _stored_data_version()
+            cache.set_version(version)
+        g.data_version = version
+    return g.data_version
+
+
+def _stored_data_version():
+    return db.session.query(AppMeta.value).filter(AppMeta.key == DATA_VERSION_KEY).scalar() or 0
+
+
+def template_version():
+    """
+    The current checklist template version, read once per request. Every change to the
+    checklist items, classes or their mapping bumps it, whichever process makes it.
+    """
+    if 'template_version' not in g:
+        g.template_version = db.session.query(AppMeta.value).filter(AppMeta.key == TEMPLATE_VERSION_KEY).scalar() or 0
+    return g.template_version
+
+
+# Every flushed ORM change and bulk INSERT/UPDATE/DELETE records the table it wrote. A commit that
+# wrote a table the reports read bumps the data version as part of the same transaction, so
+# writers only queue on the app_meta row when a report actually has to change.
+@event.listens_for(Session, 'before_flush')
+def mark_flush_write(session, flush_context, instances):
+    written = session.info.setdefault('changed_tables', set())
+    for instance in list(session.new) + list(session.deleted):
+        written.add(instance.__table__.name)
+    for instance in session.dirty:
+        if session.is_modified(instance):
+            written.add(instance.__table__.name)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def mark_statement_write(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = orm_execute_state.statement.table
+        orm_execute_state.session.info.setdefault('changed_tables', set()).add(table.name)
+
+
+@event.listens_for(Session, 'before_commit')
+def bump_data_version(session):
+    session.flush()  # Record the tables of any pending ORM changes first
+    written = session.info.pop('changed_tables', set())
+    if written - UNVERSIONED_TABLES:
+        # On the connection, so the bump itself isn't recorded as another write
+        connection = session.connection()
+        connection.execute(db.update(AppMeta).where(AppMeta.key == DATA_VERSION_KEY)
+                           .values(value=AppMeta.value + 1))
+        version = connection.execute(db.select(AppMeta.value).where(AppMeta.key == DATA_VERSION_KEY)).scalar()
+        for stamp in session.info.pop('version_stamps', []):
+            stamp(connection, version)
+        session.info['new_data_version'] = version
+
+
+@event.listens_for(Session, 'after_commit')
+def share_data_version(session):
+    # Let every worker see the new version once the data it stands for is visible to them
+    version = session.info.pop('new_data_version', None)
+    if version is not None and has_app_context():
+        report_cache().set_version(version)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def forget_write(session, previous_transaction):
+    session.info.pop('changed_tables', None)
+    session.info.pop('version_stamps', None)
+    session.info.pop('new_data_version', None)
+
+
+def stamp_with_version(session, stamp):
+    """
+    Call stamp(connection, version) while the session's transaction commits, with the data
+    version that commit produces, e.g. to mark the rows it wrote for change feeds.
+    """
+    session.info.setdefault('version_stamps', []).append(stamp)
+
+
+class LRUCache:
+    """
+    Thread-safe in-process cache of rendered responses, evicting the least recently used.
+    Each value is stored with the data version it was built from and only served for it.
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, version):
+        with self.lock:
+            cached = self.entries.get(key)
+            if cached is None or cached[0] != version:
+                return None
+            self.entries.move_to_end(key)
+            return cached[1]
+
+    def set(self, key, version, value):
+        with self.lock:
+            self.entries[key] = (version, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def get_version(self):
+        return None  # Per-process, the data version is read from the database
+
+    def set_version(self, version):
+        pass
+
+
+# Redis script: set KEYS[1] to ARGV[1] unless it already holds a higher number
+SET_IF_HIGHER = """
+local current = tonumber(redis.call('get', KEYS[1]) or '-1')
+if tonumber(ARGV[1]) > current then redis.call('set', KEYS[1], ARGV[1]) end
+"""
+
+
+class RedisCache:
+    """
+    Cache shared by every worker process, for multi-worker deployments. The data version is
+    part of the key, so entries built from older data are never read and simply expire.
+    """
+
+    def __init__(self, url, ttl=3600):
+        import redis  # Optional dependency, only needed when REPORT_CACHE_URL is set
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+
+    def get(self, key, version):
+        cached = self.client.get(f'report:{version}:{key}')
+        return tuple(json.loads(cached)) if cached is not None else None
+
+    def set(self, key, version, value):
+        self.client.set(f'report:{version}:{key}', json.dumps(value), ex=self.ttl)
+
+    def clear(self):
+        for key in self.client.scan_iter('report:*'):
+            self.client.delete(key)
+
+    def get_version(self):
+        version = self.client.get('data_version')
+        return int(version) if version is not None else None
+
+    def set_version(self, version):
+        # Only ever move forward, commits may report their versions out of order
+        self.client.eval(SET_IF_HIGHER, 1, 'data_version', version)
+
+
+def report_cache():
+    """
+    The app's report cache, built on first use from REPORT_CACHE_URL / REPORT_CACHE_MAX_ENTRIES.
+    """
+    cache = current_app.extensions.get('report_cache')
+    if cache is None:
+        url = current_app.config.get('REPORT_CACHE_URL')
+        cache = RedisCache(url) if url else LRUCache(current_app.config.get('REPORT_CACHE_MAX_ENTRIES', 256))
+        current_app.extensions['report_cache'] = cache
+    return cache
+
+
+def report_etag(version):
+    """
+    ETag for a cached report: the same data version and code always render the same bytes.
+    """
+    return f'{BUILD_ID}.{version}'
+
+
+def cached_report(view):
+    """
+    Serve a read-only page or JSON endpoint from the report cache until the next write.
+    Responses are keyed by path and query string (e.g. order_by), only 200s are stored.
+    A client already holding the current version (If-None-Match) gets a 304 before any
+    cache lookup, query or template rendering.
+    """
+    @wraps(view)
+    def decorated_function(*args, **kwargs):
+        version = data_version()
+        etag = report_etag(version)
+        if request.if_none_match.contains(etag):
+            response = current_app.response_class(status=304)
+        else:
+            cache = report_cache()
+            key = request.full_path
+            cached = cache.get(key, version)
+            if cached is not None:
+                body, mimetype = cached
+                response = current_app.response_class(body, mimetype=mimetype)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200 or response.is_streamed:
+                    return response
+                cache.set(key, version, (response.get_data(as_text=True), response.mimetype))
+
+        # Browsers keep the copy but check back every time, which costs a 304 when nothing changed
+        response.set_etag(etag)
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+        return response
+    return decorated_function
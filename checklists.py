@@ -0,0 +1,724 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import event, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, object_session
+from models import db, AppMeta, ChecklistItem, ChecklistSyncEdit, Entry, EntryClass, InspectionChecklist, InspectionItem, InspectionItemChange, ItemKind, RESULT_KINDS, checklist_item_classes, normalize_class
+from status import refresh_entry_status
+from cache import TEMPLATE_VERSION_KEY, template_version
+
+# Checklist templates per class: class_type -> (template version, list of item columns),
+# plus the class list itself under the key None. Entries are only used while their template
+# version is current, so a change made by another worker or the CLI reloads them here too.
+template_cache = {}
+template_cache_lock = threading.Lock()
+
+
+def _cached_templates(key):
+    # (current template version, cached value or None)
+    version = template_version()
+    with template_cache_lock:
+        cached = template_cache.get(key)
+    return version, cached[1] if cached is not None and cached[0] == version else None
+
+
+def _cache_templates(key, version, value):
+    with template_cache_lock:
+        template_cache[key] = (version, value)
+
+
+def template_items(class_type):
+    """
+    Return the inspection item templates that apply to a class, cached until the template version changes.
+    Each template is a dict of the InspectionItem columns copied from checklist_items.
+    """
+    class_type = class_type.lower()
+    version, cached = _cached_templates(class_type)
+    if cached is not None:
+        return cached
+
+    # One lookup through the class-first primary key of checklist_item_classes
+    applicable_items = db.session.query(
+        ChecklistItem.id,
+        ChecklistItem.kind,
+        ChecklistItem.item_name,
+        ChecklistItem.brand_required,
+        ChecklistItem.standard_required,
+        ChecklistItem.expiry_date_required,
+        ChecklistItem.rops_required
+    ).join(checklist_item_classes, checklist_item_classes.c.checklist_item_id == ChecklistItem.id) \
+     .join(EntryClass, EntryClass.id == checklist_item_classes.c.class_id) \
+     .filter(EntryClass.code == class_type) \
+     .order_by(ChecklistItem.id).all()
+
+    templates = [
+        {
+            'checklist_item_id': item.id,
+            'kind': item.kind,
+            'item_name': item.item_name,
+            'brand_required': bool(item.brand_required),
+            'standard_required': bool(item.standard_required),
+            'expiry_date_required': bool(item.expiry_date_required),
+            'rops_required': bool(item.rops_required)
+        }
+        for item in applicable_items
+    ]
+    _cache_templates(class_type, version, templates)
+    return templates
+
+
+def entry_classes():
+    """
+    The classes from the entry_classes table as (code, name) pairs in form order, cached like template_items.
+    """
+    version, cached = _cached_templates(None)
+    if cached is not None:
+        return cached
+
+    classes = [(row.code, row.name) for row in
+               db.session.query(EntryClass.code, EntryClass.name).order_by(EntryClass.position, EntryClass.id)]
+    _cache_templates(None, version, classes)
+    return classes
+
+
+def class_names():
+    """
+    Class names as offered on the forms, e.g. ['Tuner', 'Clubsprint', ...].
+    """
+    return [name for code, name in entry_classes()]
+
+
+def add_entry_class(name, items_from=None):
+    """
+    Add a class after the existing ones, optionally inspected with the same checklist items as
+    the class named items_from. Commits and returns the new EntryClass.
+    """
+    code = normalize_class(name)
+    if EntryClass.query.filter_by(code=code).first():
+        raise ValueError(f"Class {name!r} already exists")
+    entry_class = EntryClass(code=code, name=name.strip(),
+                             position=(db.session.query(func.max(EntryClass.position)).scalar() or 0) + 1)
+    if items_from:
+        source = EntryClass.query.filter_by(code=normalize_class(items_from)).first()
+        if source is None:
+            raise ValueError(f"Unknown class {items_from!r}")
+        entry_class.checklist_items = list(source.checklist_items)
+    db.session.add(entry_class)
+    db.session.commit()
+    return entry_class
+
+
+def invalidate_template_cache():
+    """
+    Forget this process's cached templates and classes so the next use reloads them from the database.
+    """
+    with template_cache_lock:
+        template_cache.clear()
+
+
+def _templates_changed(target):
+    invalidate_template_cache()
+    session = object_session(target)
+    if session is not None:
+        session.info['templates_changed'] = True
+
+
+# Any change to checklist_items or the classes through the ORM invalidates this process's cache
+# at once and bumps the template version for the other processes when it commits. On SQLite,
+# triggers (migration 14) also bump it for changes made with plain SQL.
+@event.listens_for(ChecklistItem, 'after_insert')
+@event.listens_for(ChecklistItem, 'after_update')
+@event.listens_for(ChecklistItem, 'after_delete')
+@event.listens_for(EntryClass, 'after_insert')
+@event.listens_for(EntryClass, 'after_update')
+@event.listens_for(EntryClass, 'after_delete')
+def checklist_items_changed(mapper, connection, target):
+    _templates_changed(target)
+
+
+@event.listens_for(ChecklistItem.classes, 'append')
+@event.listens_for(ChecklistItem.classes, 'remove')
+def checklist_item_classes_changed(target, value, initiator):
+    _templates_changed(target)
+
+
+@event.listens_for(Session, 'before_commit')
+def bump_template_version(session):
+    if session.info.pop('templates_changed', False):
+        # On the connection, so the data version listeners don't count it as another write
+        session.connection().execute(db.update(AppMeta).where(AppMeta.key == TEMPLATE_VERSION_KEY)
+                                     .values(value=AppMeta.value + 1))
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def forget_template_change(session, previous_transaction):
+    session.info.pop('templates_changed', None)
+
+
+def create_checklists(entries):
+    """
+    Create a checklist and its inspection items for each entry in a single bulk insert.
+    Runs inside the caller's transaction, so the caller is responsible for committing.
+    Returns the new checklists keyed by entry ID.
+    """
+    entries = list(entries)
+    if not entries:
+        return {}
+
+    checklists = {entry.id: InspectionChecklist(entry_id=entry.id) for entry in entries}
+    db.session.add_all(checklists.values())
+    db.session.flush()  # Assigns the checklist IDs
+
+    items = [
+        dict(template, checklist_id=checklists[entry.id].id)
+        for entry in entries
+        for template in template_items(entry.class_type)
+    ]
+    if items:
+        db.session.execute(db.insert(InspectionItem), items)
+
+    refresh_entry_status(checklists.keys())
+    return checklists
+
+
+def create_checklist(entry):
+    """
+    Create the checklist and inspection items for one entry, see create_checklists.
+    """
+    return create_checklists([entry])[entry.id]
+
+
+def get_or_create_checklist(entry):
+    """
+    Return the entry's checklist, creating and committing it if the entry has none yet.
+    If another tablet creates it at the same moment the unique entry_id index rejects the
+    second insert, and that tablet picks up the winner's checklist instead.
+    """
+    checklist = InspectionChecklist.query.filter_by(entry_id=entry.id).first()
+    if checklist:
+        return checklist
+    try:
+        checklist = create_checklist(entry)
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        checklist = InspectionChecklist.query.filter_by(entry_id=entry.id).one()
+    return checklist
+
+
+def entries_without_checklist():
+    """
+    IDs of the entries that have not been presented yet, i.e. have no checklist.
+    """
+    rows = db.session.query(Entry.id) \
+        .outerjoin(InspectionChecklist, Entry.id == InspectionChecklist.entry_id) \
+        .filter(InspectionChecklist.id == None) \
+        .order_by(Entry.id).all()
+    return [row[0] for row in rows]
+
+
+def provision_chunk(entry_ids):
+    """
+    Create checklists for one chunk of entries and commit, skipping any that gained a
+    checklist in the meantime. Returns the number of checklists created.
+    """
+    missing = db.session.query(Entry) \
+        .outerjoin(InspectionChecklist, Entry.id == InspectionChecklist.entry_id) \
+        .filter(Entry.id.in_(entry_ids), InspectionChecklist.id == None).all()
+    try:
+        created = create_checklists(missing)
+        db.session.commit()
+        return len(created)
+    except IntegrityError:
+        # Raced with a tablet opening one of these cars, fall back to one entry at a time
+        db.session.rollback()
+        created = 0
+        for entry in missing:
+            if not InspectionChecklist.query.filter_by(entry_id=entry.id).first():
+                create_checklist(entry)
+                db.session.commit()
+                created += 1
+        return created
+
+
+def provision_checklists(chunk_size=50, workers=1):
+    """
+    Create checklists for every entry missing one, in chunks of chunk_size entries.
+    With workers > 1 the chunks are committed in parallel threads, each with its own
+    session; keep the default of 1 on SQLite, which only allows one writer at a time.
+    Safe to run repeatedly. Returns the number of checklists created.
+    """
+    entry_ids = entries_without_checklist()
+    chunks = [entry_ids[start:start + chunk_size] for start in range(0, len(entry_ids), chunk_size)]
+    if workers <= 1 or len(chunks) <= 1:
+        return sum(provision_chunk(chunk) for chunk in chunks)
+
+    app = current_app._get_current_object()
+
+    def run_chunk(chunk):
+        with app.app_context():
+            return provision_chunk(chunk)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return sum(executor.map(run_chunk, chunks))
+
+
+def dedupe_checklists():
+    """
+    Remove extra checklists created for the same entry before the unique index existed,
+    keeping the first one. Returns the IDs of the entries that were cleaned up.
+    """
+    duplicates = db.session.query(InspectionChecklist.entry_id, func.min(InspectionChecklist.id)) \
+        .group_by(InspectionChecklist.entry_id) \
+        .having(func.count(InspectionChecklist.id) > 1).all()
+    for entry_id, keep_id in duplicates:
+        extra_ids = [row[0] for row in db.session.query(InspectionChecklist.id)
+                     .filter(InspectionChecklist.entry_id == entry_id, InspectionChecklist.id != keep_id)]
+        db.session.execute(db.delete(InspectionItem).where(InspectionItem.checklist_id.in_(extra_ids)))
+        db.session.execute(db.delete(InspectionChecklist).where(InspectionChecklist.id.in_(extra_ids)))
+    entry_ids = [entry_id for entry_id, _ in duplicates]
+    refresh_entry_status(entry_ids)
+    db.session.commit()
+    return entry_ids
+
+
+# Form marker sent by the checklist pages when only edited fields are included
+UNCHANGED_MARKER = 'unchanged'
+
+# Per-item fields a scrutineer can edit, and the "<required flag>" that enables each one
+EDITABLE_FIELDS = {
+    'brand': 'brand_required',
+    'standard': 'standard_required',
+    'expiry_date': 'expiry_date_required',
+    'rops': 'rops_required',
+}
+
+# Checklist-level fields the forms and the sync API can set
+CHECKLIST_FIELDS = ['scrutineer_name', 'scrutineer_licence_number', 'date', 'time']
+
+# Valid values for InspectionItem.status
+ITEM_STATUSES = ['Pending', 'Pass', 'Fail', 'NA']
+
+
+def _form_value(form, key, dirty_only):
+    # (present, value) for a form field; with dirty_only a missing field means "unchanged"
+    if key in form:
+        return True, form.get(key)
+    return not dirty_only, None
+
+
+def _parse_date(value):
+    return datetime.strptime(value, '%Y-%m-%d').date() if value else None
+
+
+def _parse_time(value):
+    return datetime.strptime(value, '%H:%M:%S').time() if value else None
+
+
+def _load_items(checklist_id, item_ids=None):
+    # Stored item values as plain rows keyed by item ID, without loading ORM objects
+    query = db.session.query(
+        InspectionItem.id, InspectionItem.checklist_id, InspectionItem.kind, InspectionItem.item_name, InspectionItem.status,
+        InspectionItem.value, InspectionItem.brand, InspectionItem.standard, InspectionItem.expiry_date,
+        InspectionItem.rops, InspectionItem.brand_required, InspectionItem.standard_required,
+        InspectionItem.expiry_date_required, InspectionItem.rops_required, InspectionItem.version
+    ).filter(InspectionItem.checklist_id == checklist_id)
+    if item_ids is not None:
+        query = query.filter(InspectionItem.id.in_(item_ids))
+    return {item.id: item for item in query.all()}
+
+
+def _item_changes(item, new_values):
+    # Keep only the values that differ from the stored row
+    return {field: value for field, value in new_values.items() if value != getattr(item, field)}
+
+
+def _checklist_changes(checklist, new_values):
+    # Change records for the checklist-level values that differ from the stored ones.
+    # The checklist itself is left alone, _write_changes writes them with the version bump.
+    return [
+        {'item_id': None, 'field': field, 'old_value': getattr(checklist, field), 'new_value': value}
+        for field, value in new_values.items() if value != getattr(checklist, field)
+    ]
+
+
+class ChecklistConflict(Exception):
+    """
+    Raised when a checklist save was based on an older version than the stored one.
+    items lists the checklist items changed since that version, with their stored values.
+    """
+
+    def __init__(self, checklist_id, expected_version, current_version, items, fields):
+        super().__init__(f"Checklist {checklist_id} was saved by someone else "
+                         f"(version {current_version}, the form had version {expected_version})")
+        self.checklist_id = checklist_id
+        self.expected_version = expected_version
+        self.current_version = current_version
+        self.items = items
+        self.fields = fields
+
+    def to_dict(self):
+        return {
+            'error': 'conflict',
+            'checklist_id': self.checklist_id,
+            'expected_version': self.expected_version,
+            'current_version': self.current_version,
+            'items': self.items,
+            'fields': self.fields
+        }
+
+
+def _claim_version(checklist_id, expected_version=None, values=None):
+    # Compare-and-swap the checklist version, writing the checklist-level values in the same
+    # statement. Returns the new version, or None (with nothing written) when it has moved on.
+    update = db.update(InspectionChecklist).where(InspectionChecklist.id == checklist_id)
+    if expected_version is not None:
+        update = update.where(InspectionChecklist.version == expected_version)
+    result = db.session.execute(update.values(dict(values or {}, version=InspectionChecklist.version + 1))
+                                .execution_options(synchronize_session=False))
+    if result.rowcount != 1:
+        return None
+    return db.session.query(InspectionChecklist.version).filter(InspectionChecklist.id == checklist_id).scalar()
+
+
+def _checklist_conflict(checklist_id, expected_version):
+    # Describe what other saves changed on a checklist since expected_version
+    current_version = db.session.query(InspectionChecklist.version) \
+        .filter(InspectionChecklist.id == checklist_id).scalar()
+    changes = db.session.query(InspectionItemChange.item_id, InspectionItemChange.field,
+                               InspectionItemChange.changed_by) \
+        .filter(InspectionItemChange.checklist_id == checklist_id,
+                InspectionItemChange.checklist_version > expected_version) \
+        .order_by(InspectionItemChange.id).all()
+
+    changed_by = {}
+    fields = []
+    for change in changes:
+        if change.item_id is None:
+            if change.field not in fields:
+                fields.append(change.field)
+        else:
+            changed_by[change.item_id] = change.changed_by
+
+    items = _load_items(checklist_id, list(changed_by)) if changed_by else {}
+    diverging = [
+        {'item_id': item.id, 'item_name': item.item_name, 'changed_by': changed_by[item.id],
+         'server': _item_values(item)}
+        for item in items.values()
+    ]
+    return ChecklistConflict(checklist_id, expected_version, current_version, diverging, fields)
+
+
+def _write_changes(checklist, items, item_updates, checklist_changes, changed_by=None, expected_version=None):
+    """
+    Write changed items as one bulk UPDATE (bumping each item's version), recompute the
+    approval flag, record every changed field and refresh the entry's status summary.
+    item_updates maps item ID to its changed fields. Returns the list of changes.
+
+    Any write also bumps the checklist version, in the same UPDATE as the checklist-level
+    values. When expected_version is given the bump is a compare-and-swap, and
+    ChecklistConflict is raised before anything is written if another save got there first.
+    """
+    changes = [
+        {'item_id': item_id, 'field': field, 'old_value': getattr(items[item_id], field), 'new_value': value}
+        for item_id, fields in item_updates.items()
+        for field, value in fields.items()
+    ]
+
+    # The vehicle is approved when its "Approved to Start" item is a Pass
+    approval_status = next((item_updates.get(item.id, {}).get('status', item.status)
+                            for item in items.values() if item.kind == ItemKind.APPROVAL), None)
+    changes += _checklist_changes(checklist, {'approved_to_start': approval_status == 'Pass'})
+    changes += checklist_changes
+    if not changes:
+        return changes
+
+    checklist_values = {change['field']: change['new_value'] for change in changes if change['item_id'] is None}
+    version = _claim_version(checklist.id, expected_version, checklist_values)
+    if version is None:
+        raise _checklist_conflict(checklist.id, expected_version)
+    db.session.expire(checklist)  # Written behind the ORM's back, reload on next access
+
+    if item_updates:
+        db.session.execute(db.update(InspectionItem), [
+            dict(fields, id=item_id, version=items[item_id].version + 1)
+            for item_id, fields in item_updates.items()
+        ])
+
+    changed_at = datetime.now()
+    db.session.execute(db.insert(InspectionItemChange), [
+        {
+            'checklist_id': checklist.id,
+            'item_id': change['item_id'],
+            'field': change['field'],
+            'old_value': None if change['old_value'] is None else str(change['old_value']),
+            'new_value': None if change['new_value'] is None else str(change['new_value']),
+            'changed_by': changed_by,
+            'changed_at': changed_at,
+            'checklist_version': version
+        }
+        for change in changes
+    ])
+    # Update the entry's inspection summary in the same transaction
+    refresh_entry_status([checklist.entry_id])
+    return changes
+
+
+def save_checklist(checklist_id, form, changed_by=None):
+    """
+    Apply a submitted checklist form, writing only the items whose values actually changed.
+    When the form carries omitted=unchanged, fields left out of the form keep their stored value.
+    When the form carries the checklist version it was rendered with, a save made on top of
+    someone else's raises ChecklistConflict instead of overwriting it.
+    Everything is committed in one transaction. Returns the list of changes.
+    """
+    dirty_only = form.get('omitted') == UNCHANGED_MARKER
+    expected_version = int(form['version']) if form.get('version') else None
+    checklist = db.session.get(InspectionChecklist, checklist_id)
+    if checklist is None:
+        raise ValueError(f"Checklist {checklist_id} not found")
+
+    items = _load_items(checklist.id)
+    item_updates = {}
+    for item in items.values():
+        new_values = {}
+
+        # Handle special items separately
+        if item.kind not in RESULT_KINDS:
+            form_key = {ItemKind.WEIGHT: f'vehicle_weight_{item.id}', ItemKind.DATE: 'date', ItemKind.TIME: 'time'}.get(item.kind)
+            value = form.get(form_key) if form_key else None
+            if value:
+                new_values['value'] = value
+        else:
+            status = form.get(f'status_{item.id}')
+            if status:
+                new_values['status'] = status
+
+            # Conditionally update extra fields based on item requirements
+            for field, required_flag in EDITABLE_FIELDS.items():
+                if not getattr(item, required_flag):
+                    continue
+                present, value = _form_value(form, f'{field}_{item.id}', dirty_only)
+                if present:
+                    new_values[field] = _parse_date(value) if field == 'expiry_date' else value
+
+        new_values = _item_changes(item, new_values)
+        if new_values:
+            item_updates[item.id] = new_values
+
+    # Update checklist-level attributes
+    new_checklist_values = {}
+    for field in ('scrutineer_name', 'scrutineer_licence_number'):
+        present, value = _form_value(form, field, dirty_only)
+        if present:
+            new_checklist_values[field] = value
+    if form.get('date'):
+        new_checklist_values['date'] = _parse_date(form.get('date'))
+    if form.get('time'):
+        new_checklist_values['time'] = _parse_time(form.get('time'))
+
+    changes = _write_changes(checklist, items, item_updates,
+                             _checklist_changes(checklist, new_checklist_values), changed_by, expected_version)
+    db.session.commit()
+    return changes
+
+
+def _item_values(item):
+    # Current values of an item as sent back to tablets
+    return {
+        'status': item.status,
+        'value': item.value,
+        'brand': item.brand,
+        'standard': item.standard,
+        'expiry_date': item.expiry_date.isoformat() if item.expiry_date else None,
+        'rops': item.rops,
+        'version': item.version
+    }
+
+
+# Times a checklist's synced edits are re-read and re-checked after another save got in first
+SYNC_ATTEMPTS = 3
+
+
+def _checklist_fields_changed_since(checklist_id, base_version, fields):
+    # The checklist-level fields among fields that a save after base_version changed
+    if not fields:
+        return []
+    rows = db.session.query(InspectionItemChange.field).distinct() \
+        .filter(InspectionItemChange.checklist_id == checklist_id,
+                InspectionItemChange.item_id == None,
+                InspectionItemChange.field.in_(fields),
+                InspectionItemChange.checklist_version > base_version).all()
+    changed = {row.field for row in rows}
+    return [field for field in fields if field in changed]
+
+
+def _checklist_value(checklist, field):
+    # A checklist-level value as sent back to tablets
+    value = getattr(checklist, field)
+    return value.isoformat() if hasattr(value, 'isoformat') else value
+
+
+def _sync_checklist(checklist, checklist_edits, changed_by=None):
+    """
+    Check and apply the queued edits for one checklist against its current items, see
+    sync_checklist_edits. The write is a compare-and-swap on the checklist version read here,
+    so it raises ChecklistConflict, having written nothing, when another save or sync committed
+    in between. Returns (partial result, [(edit_id, outcome)] to record).
+    """
+    db.session.refresh(checklist)  # Current version and checklist-level values
+    expected_version = checklist.version
+    items = _load_items(checklist.id)
+    result = {'applied': [], 'conflicts': [], 'errors': [], 'versions': {}}
+    item_updates = {}
+    new_checklist_values = {}
+    records = []
+    for edit in checklist_edits:
+        edit_id = str(edit['edit_id'])
+        fields = edit.get('fields') or {}
+        base_version = edit.get('base_version')
+        try:
+            if not isinstance(fields, dict):
+                raise ValueError("fields must be an object")
+            if edit.get('item_id') is None:
+                new_values = {field: fields[field] for field in CHECKLIST_FIELDS if field in fields}
+                moved = _checklist_fields_changed_since(checklist.id, int(base_version), list(new_values)) \
+                    if base_version is not None else []
+                if moved:
+                    # Another save changed these values after the tablet read them, keep theirs
+                    result['conflicts'].append({'edit_id': edit_id, 'item_id': None, 'item_name': ', '.join(moved),
+                                                'server': {field: _checklist_value(checklist, field) for field in moved}})
+                    records.append((edit_id, 'conflict'))
+                    continue
+                if 'date' in new_values:
+                    new_values['date'] = _parse_date(new_values['date'])
+                if 'time' in new_values:
+                    new_values['time'] = _parse_time(new_values['time'])
+                new_checklist_values.update(new_values)
+                # The Date/Time rows mirror the checklist's date and time
+                for item in items.values():
+                    if item.kind == ItemKind.DATE and fields.get('date'):
+                        item_updates.setdefault(item.id, {}).update(_item_changes(item, {'value': fields['date']}))
+                    elif item.kind == ItemKind.TIME and fields.get('time'):
+                        item_updates.setdefault(item.id, {}).update(_item_changes(item, {'value': fields['time']}))
+                result['applied'].append(edit_id)
+                records.append((edit_id, 'applied'))
+                continue
+
+            item = items.get(int(edit['item_id']))
+            if item is None:
+                raise ValueError("Item not found on this checklist")
+            if base_version is not None and int(base_version) != item.version:
+                result['conflicts'].append({'edit_id': edit_id, 'item_id': item.id, 'item_name': item.item_name,
+                                            'server': _item_values(item)})
+                records.append((edit_id, 'conflict'))
+                continue
+
+            new_values = {}
+            for field, value in fields.items():
+                if field == 'status':
+                    if value not in ITEM_STATUSES:
+                        raise ValueError(f"Invalid status {value!r}")
+                    new_values['status'] = value
+                elif field == 'value':
+                    new_values['value'] = value
+                elif field in EDITABLE_FIELDS:
+                    new_values[field] = _parse_date(value) if field == 'expiry_date' else value
+                else:
+                    raise ValueError(f"Unknown field {field!r}")
+            item_updates.setdefault(item.id, {}).update(_item_changes(item, new_values))
+            result['applied'].append(edit_id)
+            records.append((edit_id, 'applied'))
+        except (TypeError, ValueError) as e:
+            result['errors'].append({'edit_id': edit_id, 'error': str(e)})
+
+    item_updates = {item_id: fields for item_id, fields in item_updates.items() if fields}
+    _write_changes(checklist, items, item_updates,
+                   _checklist_changes(checklist, new_checklist_values), changed_by, expected_version)
+    for item_id in item_updates:
+        result['versions'][item_id] = items[item_id].version + 1
+    return result, records
+
+
+def sync_checklist_edits(edits, changed_by=None):
+    """
+    Apply a batch of queued tablet edits. Each edit is a dict with a client generated edit_id,
+    a checklist_id, an item_id (None for the checklist-level fields), the changed fields and
+    the base_version of the item the tablet edited (of the checklist, for checklist-level
+    fields). An item edit whose base_version no longer matches the stored item, or a
+    checklist-level edit whose fields were changed by a later save, is reported as a conflict
+    instead of being applied, and an edit_id that was already synced is acknowledged without
+    being applied again.
+    Each checklist is written with a compare-and-swap on its version; when another save gets
+    in between, its edits are checked again against the new values, up to SYNC_ATTEMPTS times.
+    """
+    result = {'applied': [], 'duplicates': [], 'conflicts': [], 'errors': [], 'versions': {}}
+    edit_ids = [str(edit.get('edit_id')) for edit in edits if isinstance(edit, dict) and edit.get('edit_id')]
+    seen = {row.edit_id: row.result for row in
+            ChecklistSyncEdit.query.filter(ChecklistSyncEdit.edit_id.in_(edit_ids))} if edit_ids else {}
+
+    # Group the edits per checklist so each checklist is written once
+    by_checklist = {}
+    for edit in edits:
+        if not isinstance(edit, dict):
+            result['errors'].append({'edit_id': None, 'error': "Each edit must be an object"})
+            continue
+        edit_id = str(edit.get('edit_id') or '')
+        if not edit_id or not edit.get('checklist_id'):
+            result['errors'].append({'edit_id': edit_id or None, 'error': "edit_id and checklist_id are required"})
+        elif edit_id in seen:
+            result['duplicates'].append(edit_id)
+        else:
+            try:
+                checklist_id = int(edit['checklist_id'])
+            except (TypeError, ValueError):
+                result['errors'].append({'edit_id': edit_id, 'error': f"Invalid checklist_id {edit['checklist_id']!r}"})
+                continue
+            seen[edit_id] = None
+            by_checklist.setdefault(checklist_id, []).append(edit)
+
+    synced_at = datetime.now()
+    for checklist_id, checklist_edits in by_checklist.items():
+        checklist = db.session.get(InspectionChecklist, checklist_id)
+        if checklist is None:
+            result['errors'] += [{'edit_id': edit['edit_id'], 'error': "Checklist not found"} for edit in checklist_edits]
+            continue
+
+        for attempt in range(SYNC_ATTEMPTS):
+            try:
+                checklist_result, records = _sync_checklist(checklist, checklist_edits, changed_by)
+                break
+            except ChecklistConflict:
+                continue  # Nothing was written, check the edits again against the newer values
+        else:
+            # Still losing the race, hand every edit back as a conflict with the stored values
+            items = _load_items(checklist.id)
+            db.session.refresh(checklist)
+            conflicts = []
+            for edit in checklist_edits:
+                item = items.get(int(edit['item_id'])) if str(edit.get('item_id') or '').isdigit() else None
+                if item is None and edit.get('item_id') is None and isinstance(edit.get('fields'), dict):
+                    # Checklist-level edit: report its fields with their stored values
+                    fields = [field for field in CHECKLIST_FIELDS if field in edit['fields']]
+                    conflicts.append({'edit_id': str(edit['edit_id']), 'item_id': None, 'item_name': ', '.join(fields),
+                                      'server': {field: _checklist_value(checklist, field) for field in fields}})
+                    continue
+                conflicts.append({'edit_id': str(edit['edit_id']), 'item_id': item.id if item else None,
+                                  'item_name': item.item_name if item else None,
+                                  'server': _item_values(item) if item else None})
+            checklist_result = {'applied': [], 'conflicts': conflicts, 'errors': [], 'versions': {}}
+            records = [(conflict['edit_id'], 'conflict') for conflict in conflicts]
+
+        for key in ('applied', 'conflicts', 'errors'):
+            result[key] += checklist_result[key]
+        result['versions'].update(checklist_result['versions'])
+        if records:
+            db.session.execute(db.insert(ChecklistSyncEdit), [
+                {'edit_id': edit_id, 'checklist_id': checklist.id, 'result': outcome, 'synced_at': synced_at}
+                for edit_id, outcome in records
+            ])
+
+    db.session.commit()
+    return result
@@ -0,0 +1,202 @@
+# commands.py
+import click
+from config import DATABASE_PROFILES
+from status import rebuild_entry_status
+from search import rebuild_search_index
+from checklists import add_entry_class, provision_checklists, dedupe_checklists
+from schema import ensure_unique_checklists
+from database import copy_database, full_scans
+from migrations import migrate, print_migration_status, search_index, template_version_triggers
+from models import db, User
+from sqlalchemy import create_engine, event
+import importer
+from export import EXPORT_CHUNK_SIZE, EXPORT_DATASETS, EXPORT_FORMATS, export_chunks
+
+
+def register_commands(app):
+    """
+    Add the maintenance commands to the app's 'flask' CLI.
+    """
+    # Command: Rebuild the per-entry inspection summary from the raw checklist tables
+    @app.cli.command('rebuild-entry-status')
+    def rebuild_entry_status_command():
+        count = rebuild_entry_status()
+        print(f"Rebuilt inspection status for {count} entries.")
+
+    # Command: Rebuild the lookup search index from the entries table
+    @app.cli.command('rebuild-search-index')
+    def rebuild_search_index_command():
+        rebuild_search_index()
+        print("Rebuilt the entry search index.")
+
+    # Command: Create checklists for every entry that doesn't have one yet (run before the event)
+    @app.cli.command('provision-checklists')
+    @click.option('--chunk-size', default=50, show_default=True, help="Entries per transaction.")
+    @click.option('--workers', default=1, show_default=True, help="Parallel chunks, keep at 1 on SQLite.")
+    def provision_checklists_command(chunk_size, workers):
+        count = provision_checklists(chunk_size=chunk_size, workers=workers)
+        print(f"Created {count} checklists.")
+
+    # Command: Remove duplicate checklists so the one-checklist-per-entry index can be added
+    @app.cli.command('dedupe-checklists')
+    def dedupe_checklists_command():
+        entry_ids = dedupe_checklists()
+        print(f"Removed duplicate checklists for entries: {entry_ids}")
+        ensure_unique_checklists()
+
+    # Command: Copy this database into a MySQL/PostgreSQL server, e.g. to move an event off SQLite
+    @app.cli.command('export-database')
+    @click.argument('target_url')
+    @click.option('--chunk-size', default=1000, show_default=True, help="Rows per INSERT.")
+    def export_database_command(target_url, chunk_size):
+        backend = 'mysql' if target_url.startswith('mysql') else 'postgres' if target_url.startswith('postgres') else 'sqlite'
+        copied = copy_database(db.engine, db.metadata, target_url, chunk_size=chunk_size,
+                               engine_options=DATABASE_PROFILES[backend]['engine_options'])
+        if backend == 'sqlite':
+            # The search index and triggers aren't part of the models, so they aren't copied
+            target = create_engine(target_url)
+            with target.begin() as connection:
+                search_index(connection)
+                template_version_triggers(connection)
+            target.dispose()
+        for table_name, count in copied.items():
+            print(f"{table_name}: {count} rows")
+        print(f"Copied {sum(copied.values())} rows. Start the app with DATABASE_BACKEND={backend} "
+              f"and DATABASE_URL set to use it.")
+
+    # Command: Import entries from a CSV file (vehicle number, make, model, driver, class, ...)
+    @app.cli.command('import-entries')
+    @click.argument('csv_path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--dry-run', is_flag=True, help="Validate and report without saving anything.")
+    @click.option('--provision', is_flag=True, help="Also create a checklist for each imported entry.")
+    @click.option('--chunk-size', default=importer.IMPORT_CHUNK_SIZE, show_default=True, help="Rows per transaction.")
+    def import_entries_command(csv_path, dry_run, provision, chunk_size):
+        with open(csv_path, encoding='utf-8-sig', newline='') as csv_file:
+            report = importer.import_entries(csv_file, dry_run=dry_run, provision=provision, chunk_size=chunk_size)
+        print_import_report(report)
+
+    # Command: Import officials from a CSV file (name, role, licence number, contact)
+    @app.cli.command('import-officials')
+    @click.argument('csv_path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--dry-run', is_flag=True, help="Validate and report without saving anything.")
+    def import_officials_command(csv_path, dry_run):
+        with open(csv_path, encoding='utf-8-sig', newline='') as csv_file:
+            report = importer.import_officials(csv_file, dry_run=dry_run)
+        print_import_report(report)
+
+    # Command: Write entries, checklists or inspection items to a CSV or Parquet file for post-event reporting
+    @app.cli.command('export-data')
+    @click.argument('dataset', type=click.Choice(list(EXPORT_DATASETS)))
+    @click.argument('output_path', type=click.Path(dir_okay=False))
+    @click.option('--format', 'export_format', type=click.Choice(list(EXPORT_FORMATS)),
+                  help="Defaults to the output file's extension, else csv.")
+    @click.option('--class', 'class_type', help="Only this class, e.g. 'Pro Am'.")
+    @click.option('--status', help="Approval status (Pass, Fail, Pending, NA, not_presented), or item status for items.")
+    @click.option('--chunk-size', default=EXPORT_CHUNK_SIZE, show_default=True, help="Rows read per batch.")
+    def export_data_command(dataset, output_path, export_format, class_type, status, chunk_size):
+        if not export_format:
+            extension = output_path.rsplit('.', 1)[-1].lower()
+            export_format = extension if extension in EXPORT_FORMATS else 'csv'
+        chunks = export_chunks(dataset, export_format, class_type=class_type, status=status, chunk_size=chunk_size)
+        size = 0
+        with open(output_path, 'wb') as output:
+            for chunk in chunks:
+                output.write(chunk)
+                size += len(chunk)
+        print(f"Wrote {dataset} to {output_path} ({export_format}, {size} bytes).")
+
+    # Command: Add an entry class, e.g. flask add-class "Formula Ford" --items-from Tuner
+    @app.cli.command('add-class')
+    @click.argument('name')
+    @click.option('--items-from', help="Existing class whose checklist items the new class is inspected with.")
+    def add_class_command(name, items_from):
+        try:
+            entry_class = add_entry_class(name, items_from=items_from)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        print(f"Added class {entry_class.name} ({entry_class.code}) with {len(entry_class.checklist_items)} checklist items.")
+
+    # Command: Apply pending schema migrations (also run on every start), or list them
+    @app.cli.command('migrate')
+    @click.option('--list', 'list_only', is_flag=True, help="Only show which migrations are applied.")
+    def migrate_command(list_only):
+        if not list_only:
+            for version, description in migrate(db.engine):
+                print(f"Applied {version}: {description}")
+        print_migration_status(db.engine)
+
+    # Command: Fail if a report or counter route's queries read a whole table without an index (SQLite)
+    @app.cli.command('check-query-plans')
+    def check_query_plans_command():
+        admin = User.query.filter_by(role='admin').first()
+        if admin is None:
+            raise click.ClickException("The check needs an admin user to request the report pages as.")
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['_user_id'] = str(admin.id)  # Log in the way Flask-Login does
+
+        statements = []
+        def record(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith('SELECT'):
+                statements.append((statement, parameters))
+
+        failures = 0
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            for route, allowed in QUERY_PLAN_ROUTES.items():
+                statements.clear()
+                response = client.get(route)
+                response.get_data()  # Run streamed responses to the end
+                status = response.status_code
+                queries = list(statements)  # The plan check's own queries are recorded too
+                with db.engine.connect() as connection:
+                    scans = {table for statement, parameters in queries
+                             for table in full_scans(connection, statement, parameters)} - set(allowed)
+                if status != 200 or scans:
+                    failures += 1
+                problem = f"HTTP {status}" if status != 200 else f"full scan of {', '.join(sorted(scans))}" if scans \
+                    else "ok" if queries else "ok, no queries (served from the report cache)"
+                print(f"{route:40} {len(queries):3d} queries  {problem}")
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+        if failures:
+            raise click.ClickException(f"{failures} route(s) failed the query plan check.")
+
+
+# Report and counter routes checked by 'flask check-query-plans', with the tables each one
+# may read in full. The dashboard counters aggregate every row of the one-row-per-entry summary.
+QUERY_PLAN_ROUTES = {
+    '/vehicle_weights': (),
+    '/outstanding_items': (),
+    '/outstanding_items?order_by=garage_number': (),
+    '/garage_numbers': (),
+    '/garage_numbers?order_by=garage_number': (),
+    '/denied_start': (),
+    '/not_approved': (),
+    '/not_presented': (),
+    '/scrutineers': (),
+    '/denied_start_count': (),
+    '/total_entries': (),
+    '/class_entries': (),
+    '/missing_inspections': (),
+    '/not_approved_to_start': (),
+    '/failed_items': (),
+    '/dashboard_stats': ('entry_status',),
+    '/vehicles_by_weight': (),
+    '/api/weights/analytics': (),
+    '/api/reports/changes?since=0': (),
+    '/api/entries/search?q=a': (),
+    '/export?dataset=items&status=Fail': (),
+}
+
+
+def print_import_report(report):
+    action = "Would import" if report['dry_run'] else "Imported"
+    print(f"{action} {report['imported']} of {report['rows']} rows, "
+          f"{len(report['duplicates'])} duplicates skipped, {report['error_count']} invalid.")
+    if report['checklists']:
+        print(f"Created {report['checklists']} checklists.")
+    for error in report['errors']:
+        print(f"  line {error['line']}: {error['error']}")
+    for duplicate in report['duplicates']:
+        print(f"  line {duplicate['line']}: duplicate of {duplicate.get('vehicle_number') or duplicate.get('licence_number')}")
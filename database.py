@@ -0,0 +1,78 @@
+import re
+from sqlalchemy import Integer, create_engine, event, func, inspect, select, text
+
+
+def apply_sqlite_pragmas(engine, pragmas):
+    """
+    Run the given PRAGMAs once on every new connection the engine opens, so pooled
+    connections are configured up front instead of on each request. No-op for other backends.
+    """
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+def copy_database(source_engine, metadata, target_uri, chunk_size=1000, engine_options=None):
+    """
+    Copy every table in metadata from the source database into the database at target_uri,
+    creating the tables there first. Tables are copied parents first in primary key order,
+    chunk_size rows per INSERT. The target tables must be empty. Returns {table name: rows copied}.
+    """
+    target_engine = create_engine(target_uri, **(engine_options or {}))
+    try:
+        metadata.create_all(target_engine)
+        with target_engine.connect() as target:
+            for table in metadata.sorted_tables:
+                if target.execute(select(func.count()).select_from(table)).scalar():
+                    raise ValueError(f"Target table {table.name} is not empty")
+
+        copied = {}
+        with source_engine.connect() as source, target_engine.begin() as target:
+            for table in metadata.sorted_tables:
+                if not inspect(source_engine).has_table(table.name):
+                    continue
+                # Only copy the columns the source table actually has
+                source_columns = {column['name'] for column in inspect(source_engine).get_columns(table.name)}
+                columns = [column for column in table.columns if column.name in source_columns]
+                rows = source.execution_options(yield_per=chunk_size) \
+                    .execute(select(*columns).order_by(*table.primary_key.columns))
+                copied[table.name] = 0
+                for chunk in rows.partitions():
+                    target.execute(table.insert(), [dict(row._mapping) for row in chunk])
+                    copied[table.name] += len(chunk)
+
+            # Move the ID sequences past the copied rows
+            if target_engine.dialect.name == 'postgresql':
+                for table in metadata.sorted_tables:
+                    key = list(table.primary_key.columns)
+                    if len(key) == 1 and isinstance(key[0].type, Integer) and copied.get(table.name):
+                        target.execute(text(
+                            f"SELECT setval(pg_get_serial_sequence('{table.name}', '{key[0].name}'), "
+                            f"(SELECT MAX({key[0].name}) FROM {table.name}))"
+                        ))
+        return copied
+    finally:
+        target_engine.dispose()
+
+
+def full_scans(connection, statement, parameters=()):
+    """
+    Tables SQLite's query plan for the statement reads in full, i.e. SCAN steps that use no
+    index. Only SQLite is checked, other backends return an empty list.
+    """
+    if connection.dialect.name != 'sqlite':
+        return []
+    tables = set(inspect(connection).get_table_names())
+    scans = []
+    for row in connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters):
+        # 'SCAN entries' (or 'SCAN TABLE entries' before SQLite 3.36), without 'USING ... INDEX'
+        match = re.match(r'SCAN (?:TABLE )?(\w+)', row[-1])
+        if match and match.group(1) in tables and 'INDEX' not in row[-1]:
+            scans.append(match.group(1))
+    return scans
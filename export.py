@@ -0,0 +1,172 @@
+import csv
+import io
+from sqlalchemy import Boolean, Date, Float, Integer, Time, select
+from models import db, Entry, EntryStatus, InspectionChecklist, InspectionItem, normalize_class
+
+# Rows fetched from the database cursor per batch (and per Parquet row group)
+EXPORT_CHUNK_SIZE = 1000
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+
+def _entries_query():
+    return select(
+        Entry.id.label('entry_id'), Entry.vehicle_number, Entry.vehicle_make, Entry.vehicle_model,
+        Entry.vehicle_type, Entry.class_type, Entry.driver_name, Entry.team_name, Entry.licence_number,
+        Entry.garage_number, Entry.log_book_number, Entry.power_kw, EntryStatus.checklist_id, EntryStatus.approval_status,
+        EntryStatus.failed_count, EntryStatus.pending_count, EntryStatus.na_count,
+        EntryStatus.outstanding_items, EntryStatus.vehicle_weight, EntryStatus.weight_kg
+    ).outerjoin(EntryStatus, Entry.id == EntryStatus.entry_id) \
+     .order_by(Entry.vehicle_sort_key, Entry.id)
+
+
+def _checklists_query():
+    return select(
+        InspectionChecklist.id.label('checklist_id'), InspectionChecklist.entry_id, Entry.vehicle_number,
+        Entry.class_type, InspectionChecklist.approved_to_start, EntryStatus.approval_status,
+        InspectionChecklist.scrutineer_name, InspectionChecklist.scrutineer_licence_number,
+        InspectionChecklist.date, InspectionChecklist.time, InspectionChecklist.version
+    ).join(Entry, Entry.id == InspectionChecklist.entry_id) \
+     .outerjoin(EntryStatus, Entry.id == EntryStatus.entry_id) \
+     .order_by(Entry.vehicle_sort_key, InspectionChecklist.id)
+
+
+def _items_query():
+    return select(
+        InspectionItem.id.label('item_id'), InspectionItem.checklist_id, InspectionChecklist.entry_id,
+        Entry.vehicle_number, Entry.class_type, InspectionItem.item_name, InspectionItem.status,
+        InspectionItem.brand, InspectionItem.standard, InspectionItem.expiry_date, InspectionItem.rops,
+        InspectionItem.value
+    ).join(InspectionChecklist, InspectionChecklist.id == InspectionItem.checklist_id) \
+     .join(Entry, Entry.id == InspectionChecklist.entry_id) \
+     .order_by(InspectionItem.checklist_id, InspectionItem.id)
+
+
+# Dataset name -> (query, column the status filter applies to)
+EXPORT_DATASETS = {
+    'entries': (_entries_query, EntryStatus.approval_status),
+    'checklists': (_checklists_query, EntryStatus.approval_status),
+    'items': (_items_query, InspectionItem.status),
+}
+
+
+def export_query(dataset, class_type=None, status=None):
+    """
+    SELECT for one export dataset, optionally limited to a class (any spelling the add entry
+    form accepts) and a status. For entries and checklists the status is the "Approved to Start"
+    status (Pass, Fail, Pending, NA, or not_presented for entries without a checklist);
+    for items it is the item's own status.
+    """
+    if dataset not in EXPORT_DATASETS:
+        raise ValueError(f"Unknown dataset {dataset!r}, expected one of: {', '.join(EXPORT_DATASETS)}")
+    build_query, status_column = EXPORT_DATASETS[dataset]
+    query = build_query()
+    if class_type:
+        query = query.where(Entry.class_type == normalize_class(class_type))
+    if status == 'not_presented':
+        query = query.where(EntryStatus.checklist_id == None)
+    elif status:
+        query = query.where(status_column == status)
+    return query
+
+
+def _batches(query, chunk_size):
+    # Stream the result from the database cursor chunk_size rows at a time
+    result = db.session.execute(query, execution_options={'yield_per': chunk_size})
+    yield from result.partitions()
+
+
+def _csv_chunks(query, chunk_size):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([column.name for column in query.selected_columns])
+    for batch in _batches(query, chunk_size):
+        writer.writerows(batch)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')  # Header only, nothing matched
+
+
+class _ParquetSink:
+    # Write-only file object for pyarrow that hands the written bytes back in pieces,
+    # so a Parquet file can be streamed out while it is still being written
+    closed = False
+
+    def __init__(self):
+        self.pieces = []
+        self.position = 0
+
+    def write(self, data):
+        data = bytes(data)
+        self.pieces.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self.pieces)
+        self.pieces.clear()
+        return data
+
+
+def _arrow_type(pa, column_type):
+    if isinstance(column_type, Boolean):
+        return pa.bool_()
+    if isinstance(column_type, Integer):
+        return pa.int64()
+    if isinstance(column_type, Float):
+        return pa.float64()
+    if isinstance(column_type, Date):
+        return pa.date32()
+    if isinstance(column_type, Time):
+        return pa.time64('us')
+    return pa.string()
+
+
+def _parquet_chunks(query, chunk_size):
+    try:
+        import pyarrow as pa  # Optional dependency, only needed for Parquet exports
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet export needs the pyarrow package (pip install pyarrow).")
+    return _write_parquet(pa, pq, query, chunk_size)
+
+
+def _write_parquet(pa, pq, query, chunk_size):
+    columns = list(query.selected_columns)
+    schema = pa.schema([(column.name, _arrow_type(pa, column.type)) for column in columns])
+    sink = _ParquetSink()
+    with pq.ParquetWriter(pa.PythonFile(sink, mode='w'), schema) as writer:
+        for batch in _batches(query, chunk_size):
+            # One row group per batch, built column by column from the fetched rows
+            writer.write_batch(pa.record_batch(
+                [pa.array(values, type=field.type) for values, field in zip(zip(*batch), schema)],
+                schema=schema
+            ))
+            yield sink.drain()
+    yield sink.drain()  # Footer
+
+
+def export_chunks(dataset, format='csv', class_type=None, status=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Generate an export of one dataset ('entries', 'checklists' or 'items') as pieces of bytes,
+    in 'csv' or 'parquet' format, reading chunk_size rows at a time so memory use does not
+    grow with the size of the event. The query is checked before the first piece is generated.
+    """
+    if format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown format {format!r}, expected one of: {', '.join(EXPORT_FORMATS)}")
+    query = export_query(dataset, class_type=class_type, status=status)
+    return _csv_chunks(query, chunk_size) if format == 'csv' else _parquet_chunks(query, chunk_size)
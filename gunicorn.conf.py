@@ -0,0 +1,32 @@
+# gunicorn.conf.py
+# Production server settings, used by the Procfile: gunicorn -c gunicorn.conf.py wsgi:app
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+
+# Worker processes (WEB_CONCURRENCY is set by Heroku per dyno size) and threads per worker.
+# Threads suit this app: requests mostly wait on the database, not the CPU.
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+worker_class = 'gthread'
+
+# Import the app (and upgrade the schema) once in the master, then fork the workers
+preload_app = True
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+keepalive = 5
+max_requests = 1000  # Recycle workers now and then to cap memory growth
+max_requests_jitter = 100
+
+accesslog = '-'
+errorlog = '-'
+
+
+def post_fork(server, worker):
+    # Connections opened in the master before the fork must not be shared between workers,
+    # drop them from this worker's pool (without closing the master's) so it opens its own
+    from wsgi import app
+    from models import db
+    with app.app_context():
+        db.engine.dispose(close=False)
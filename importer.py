@@ -0,0 +1,180 @@
+import csv
+import io
+from itertools import islice
+from sqlalchemy import func
+from models import db, Entry, Officials, Roles, natural_sort_key, normalize_class
+from status import refresh_entry_status
+from checklists import create_checklists, entry_classes
+from weights import parse_power
+
+# Rows per INSERT and per transaction
+IMPORT_CHUNK_SIZE = 200
+
+# Validation messages kept in the report, the rest are only counted
+MAX_REPORTED_ERRORS = 100
+
+# Accepted CSV headers (lower case, spaces as underscores) for each entry field
+ENTRY_COLUMNS = {
+    'vehicle_number': ['vehicle_number', 'car_number', 'number', 'car_no'],
+    'vehicle_make': ['vehicle_make', 'make'],
+    'vehicle_model': ['vehicle_model', 'model'],
+    'driver_name': ['driver_name', 'driver'],
+    'class_type': ['class', 'class_type'],
+    'garage_number': ['garage_number', 'garage'],
+    'log_book_number': ['log_book_number', 'log_book', 'logbook'],
+    'licence_number': ['licence_number', 'license_number', 'licence'],
+    'team_name': ['team_name', 'team'],
+    'power_kw': ['power_kw', 'power', 'kw'],
+}
+ENTRY_REQUIRED = ['vehicle_number', 'vehicle_make', 'vehicle_model', 'driver_name', 'class_type']
+
+OFFICIAL_COLUMNS = {
+    'name': ['name', 'official', 'official_name'],
+    'role': ['role'],
+    'licence_number': ['licence_number', 'license_number', 'licence'],
+    'contact_info': ['contact_info', 'contact', 'phone', 'email'],
+}
+OFFICIAL_REQUIRED = ['name', 'role', 'licence_number']
+
+
+def open_csv(source):
+    """
+    Wrap an uploaded file (or any binary stream) for row by row text reading.
+    utf-8-sig drops the byte order mark Excel puts at the start of CSV exports.
+    """
+    return io.TextIOWrapper(source, encoding='utf-8-sig', newline='')
+
+
+def _field_map(header, columns):
+    # CSV column name for each field, from the first accepted header present
+    normalized = {name.strip().lower().replace(' ', '_'): name for name in header or []}
+    return {field: next((normalized[alias] for alias in aliases if alias in normalized), None)
+            for field, aliases in columns.items()}
+
+
+def _read_rows(reader, columns, required):
+    # Yield (line number, cleaned values, error) for each CSV row, without reading ahead
+    fields = _field_map(reader.fieldnames, columns)
+    missing = [field for field in required if fields[field] is None]
+    if missing:
+        raise ValueError(f"CSV is missing the column(s): {', '.join(missing)}")
+
+    for row in reader:
+        values = {field: (row.get(column) or '').strip() or None if column else None
+                  for field, column in fields.items()}
+        if not any(values.values()):
+            continue  # Blank line
+        empty = [field for field in required if not values[field]]
+        error = f"Missing {', '.join(empty)}" if empty else None
+        yield reader.line_num, values, error
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _new_report(dry_run):
+    return {'rows': 0, 'imported': 0, 'duplicates': [], 'errors': [], 'error_count': 0,
+            'checklists': 0, 'dry_run': dry_run}
+
+
+def _add_error(report, line, message):
+    report['error_count'] += 1
+    if len(report['errors']) < MAX_REPORTED_ERRORS:
+        report['errors'].append({'line': line, 'error': message})
+
+
+def import_entries(csv_file, dry_run=False, provision=False, chunk_size=IMPORT_CHUNK_SIZE):
+    """
+    Import World Time Attack entries from a CSV text stream, one row at a time.
+    Classes are normalised like the add entry form and must be in the entry_classes table.
+    Rows whose vehicle number is already entered (or earlier in the file) are skipped.
+    Valid rows are inserted chunk_size at a time, one transaction per chunk, and with
+    provision=True each chunk's checklists are created in the same transaction.
+    dry_run validates everything without writing. Returns a report dict.
+    """
+    report = _new_report(dry_run)
+    valid_classes = {code for code, name in entry_classes()}
+    taken = {number for (number,) in db.session.query(func.upper(Entry.vehicle_number))}
+
+    def valid_rows():
+        for line, values, error in _read_rows(csv.DictReader(csv_file), ENTRY_COLUMNS, ENTRY_REQUIRED):
+            report['rows'] += 1
+            if not error:
+                values['class_type'] = normalize_class(values['class_type'])
+                if values['class_type'] not in valid_classes:
+                    error = f"Unknown class {values['class_type']!r}"
+                elif len(values['vehicle_number']) > Entry.vehicle_number.type.length:
+                    error = f"Vehicle number {values['vehicle_number']!r} is too long"
+                elif values['power_kw'] and parse_power(values['power_kw']) is None:
+                    error = f"Power {values['power_kw']!r} is not a number of kW"
+            if error:
+                _add_error(report, line, error)
+                continue
+
+            number = values['vehicle_number'].upper()
+            if number in taken:
+                report['duplicates'].append({'line': line, 'vehicle_number': values['vehicle_number']})
+                continue
+            taken.add(number)
+            yield values
+
+    for chunk in _chunks(valid_rows(), chunk_size):
+        report['imported'] += len(chunk)
+        if dry_run:
+            continue
+
+        # Bulk inserts skip the ORM events, so the sort keys are filled in here
+        db.session.execute(db.insert(Entry), [
+            dict(values,
+                 licence_number=values['licence_number'] or '000000',
+                 power_kw=parse_power(values['power_kw']),
+                 vehicle_type='W',
+                 vehicle_sort_key=natural_sort_key(values['vehicle_number']),
+                 garage_sort_key=natural_sort_key(values['garage_number']))
+            for values in chunk
+        ])
+        entries = db.session.query(Entry.id, Entry.class_type) \
+            .filter(Entry.vehicle_number.in_([values['vehicle_number'] for values in chunk])).all()
+        refresh_entry_status([entry.id for entry in entries])
+        if provision:
+            report['checklists'] += len(create_checklists(entries))
+        db.session.commit()
+    return report
+
+
+def import_officials(csv_file, dry_run=False, chunk_size=IMPORT_CHUNK_SIZE):
+    """
+    Import officials from a CSV text stream, one row at a time. The role must match one of
+    the roles table (any case); rows whose licence number is already on file are skipped.
+    dry_run validates everything without writing. Returns a report dict.
+    """
+    report = _new_report(dry_run)
+    roles = {role.role_name.lower(): role.role_name for role in Roles.query.all()}
+    taken = {number.upper() for (number,) in db.session.query(Officials.licence_number) if number}
+
+    def valid_rows():
+        for line, values, error in _read_rows(csv.DictReader(csv_file), OFFICIAL_COLUMNS, OFFICIAL_REQUIRED):
+            report['rows'] += 1
+            if not error and values['role'].lower() not in roles:
+                error = f"Unknown role {values['role']!r}"
+            if error:
+                _add_error(report, line, error)
+                continue
+
+            values['role'] = roles[values['role'].lower()]
+            number = values['licence_number'].upper()
+            if number in taken:
+                report['duplicates'].append({'line': line, 'licence_number': values['licence_number']})
+                continue
+            taken.add(number)
+            yield values
+
+    for chunk in _chunks(valid_rows(), chunk_size):
+        report['imported'] += len(chunk)
+        if not dry_run:
+            db.session.execute(db.insert(Officials), chunk)
+            db.session.commit()
+    return report
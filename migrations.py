@@ -0,0 +1,351 @@
+# migrations.py
+# Numbered schema migrations, applied in order and recorded in the schema_migrations table.
+# They run on every start (see schema.upgrade_schema), with 'flask migrate', or offline:
+#
+#     python migrations.py [--list] [DATABASE_URL]
+import sys
+from datetime import datetime
+from sqlalchemy import (Column, ForeignKey, Integer, MetaData, String, Table, column, create_engine, inspect,
+                        insert, literal, select, table, text, update)
+from sqlalchemy.orm import Session
+from models import db, ItemKind, SchemaMigration, natural_sort_key
+
+# (version, description, upgrade function taking a connection), in version order
+MIGRATIONS = []
+
+
+def migration(version, description):
+    """
+    Register an upgrade function as migration number version. Versions must only ever be
+    appended, since a database's applied versions are never re-run.
+    """
+    def register(upgrade):
+        if MIGRATIONS and version <= MIGRATIONS[-1][0]:
+            raise ValueError(f"Migration {version} is out of order")
+        MIGRATIONS.append((version, description, upgrade))
+        return upgrade
+    return register
+
+
+# Migrations spell out their tables, columns and indexes rather than reading them off the
+# models, so an old migration still does the same thing after the models change. A table
+# that doesn't exist yet is skipped, migrate() creates it complete from the models first.
+
+def _create_index(connection, table_name, name, columns, unique=False):
+    inspector = inspect(connection)
+    if inspector.has_table(table_name) and name not in {index['name'] for index in inspector.get_indexes(table_name)}:
+        connection.execute(text(f"CREATE {'UNIQUE ' if unique else ''}INDEX {name} ON {table_name} ({', '.join(columns)})"))
+
+
+def _drop_index(connection, table_name, name):
+    inspector = inspect(connection)
+    if inspector.has_table(table_name) and name in {index['name'] for index in inspector.get_indexes(table_name)}:
+        on_table = f" ON {table_name}" if connection.dialect.name == 'mysql' else ''
+        connection.execute(text(f"DROP INDEX {name}{on_table}"))
+
+
+def _add_column(connection, table_name, name, definition):
+    inspector = inspect(connection)
+    if inspector.has_table(table_name) and name not in {column['name'] for column in inspector.get_columns(table_name)}:
+        connection.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {name} {definition}"))
+
+
+@migration(1, "Index inspection items by checklist, item name and status")
+def index_inspection_items(connection):
+    _create_index(connection, 'inspection_items', 'ix_inspection_items_checklist_item', ['checklist_id', 'item_name', 'status'])
+
+
+@migration(2, "Index officials by role")
+def index_officials_role(connection):
+    _create_index(connection, 'officials', 'ix_officials_role', ['role'])
+
+
+@migration(3, "Index entries by vehicle type and class")
+def index_entries_class(connection):
+    _create_index(connection, 'entries', 'ix_entries_type_class', ['vehicle_type', 'class_type'])
+
+
+@migration(4, "Index the inspection summary by approval and weight")
+def index_entry_status(connection):
+    _create_index(connection, 'entry_status', 'ix_entry_status_approved', ['approved_to_start', 'checklist_id'])
+    _create_index(connection, 'entry_status', 'ix_entry_status_weight_kg', ['weight_kg'])
+
+
+# The checklist rows reports used to recognise by name, see models.ItemKind
+SPECIAL_ITEM_KINDS = {
+    "Approved to Start": ItemKind.APPROVAL,
+    "Vehicle Weight": ItemKind.WEIGHT,
+    "Scrutineer Name": ItemKind.SCRUTINEER_NAME,
+    "Scrutineer Licence Number": ItemKind.SCRUTINEER_LICENCE,
+    "Date": ItemKind.DATE,
+    "Time": ItemKind.TIME,
+}
+
+
+@migration(5, "Link inspection items to their checklist item template and kind")
+def inspection_item_kinds(connection):
+    _add_column(connection, 'checklist_items', 'kind', 'SMALLINT NOT NULL DEFAULT 0')
+    _add_column(connection, 'inspection_items', 'kind', 'SMALLINT NOT NULL DEFAULT 0')
+    _add_column(connection, 'inspection_items', 'checklist_item_id', 'INTEGER')
+    _drop_index(connection, 'inspection_items', 'ix_inspection_items_checklist_item')
+    _create_index(connection, 'inspection_items', 'ix_inspection_items_checklist_kind', ['checklist_id', 'kind', 'status'])
+    if not all(inspect(connection).has_table(name) for name in ('checklist_items', 'inspection_items')):
+        return
+
+    templates = table('checklist_items', column('item_name'), column('kind'))
+    items = table('inspection_items', column('item_name'), column('kind'), column('checklist_id'), column('checklist_item_id'))
+    checklists = table('inspection_checklists', column('id'), column('entry_id'))
+    entries = table('entries', column('id'), column('class_type'))
+    for item_name, kind in SPECIAL_ITEM_KINDS.items():
+        connection.execute(update(templates).where(templates.c.item_name == item_name).values(kind=int(kind)))
+        connection.execute(update(items).where(items.c.item_name == item_name).values(kind=int(kind)))
+
+    # Some names appear on more than one template, so prefer the one for the entry's class
+    template_rows = connection.execute(text("SELECT * FROM checklist_items ORDER BY id")).mappings().all()
+    pairs = connection.execute(
+        select(items.c.item_name, entries.c.class_type).distinct()
+        .select_from(items.join(checklists, checklists.c.id == items.c.checklist_id)
+                          .join(entries, entries.c.id == checklists.c.entry_id))
+    ).all()
+    for item_name, class_type in pairs:
+        candidates = [row for row in template_rows if row['item_name'] == item_name]
+        if not candidates:
+            continue  # Renamed or removed from the templates, stays unlinked
+        template = next((row for row in candidates if row.get(f"applicable_to_{(class_type or '').lower()}")), candidates[0])
+        class_checklists = select(checklists.c.id).join(entries, entries.c.id == checklists.c.entry_id) \
+            .where(entries.c.class_type == class_type)
+        connection.execute(update(items)
+                           .where(items.c.item_name == item_name, items.c.checklist_id.in_(class_checklists))
+                           .values(checklist_item_id=template['id']))
+
+
+# The classes that had an applicable_to_<code> column on checklist_items, in form order
+ORIGINAL_CLASSES = [
+    ('tuner', "Tuner"), ('clubsprint', "Clubsprint"), ('open', "Open"), ('pro_open', "Pro Open"),
+    ('pro_am', "Pro Am"), ('pro', "Pro"), ('flying_500', "Flying 500"), ('demo', "Demo"),
+]
+
+
+@migration(6, "Move class applicability into the entry_classes and checklist_item_classes tables")
+def class_registry(connection):
+    metadata = MetaData()
+    Table('checklist_items', metadata, Column('id', Integer, primary_key=True))  # Referenced only
+    classes = Table(
+        'entry_classes', metadata,
+        Column('id', Integer, primary_key=True),
+        Column('code', String(50), nullable=False, unique=True),
+        Column('name', String(100), nullable=False),
+        Column('position', Integer, nullable=False, default=0),
+    )
+    item_classes = Table(
+        'checklist_item_classes', metadata,
+        Column('class_id', Integer, ForeignKey('entry_classes.id'), primary_key=True),
+        Column('checklist_item_id', Integer, ForeignKey('checklist_items.id'), primary_key=True),
+    )
+    metadata.create_all(connection, tables=[classes, item_classes])
+    if connection.execute(select(classes.c.id).limit(1)).first():
+        return  # Already set up, e.g. by the app on a new database
+
+    connection.execute(insert(classes), [
+        {'code': code, 'name': name, 'position': position}
+        for position, (code, name) in enumerate(ORIGINAL_CLASSES, start=1)
+    ])
+    if not inspect(connection).has_table('checklist_items'):
+        return
+    flags = {column['name'] for column in inspect(connection).get_columns('checklist_items')}
+    for class_id, code in connection.execute(select(classes.c.id, classes.c.code)):
+        if f'applicable_to_{code}' not in flags:
+            continue
+        templates = table('checklist_items', column('id'), column(f'applicable_to_{code}'))
+        connection.execute(insert(item_classes).from_select(
+            ['class_id', 'checklist_item_id'],
+            select(literal(class_id), templates.c.id).where(templates.c[f'applicable_to_{code}'] == True)
+        ))
+
+
+@migration(7, "Add the sort key, version, power and weight columns of the old start-up upgrade")
+def early_columns(connection):
+    _add_column(connection, 'entries', 'vehicle_sort_key', 'VARCHAR(64)')
+    _add_column(connection, 'entries', 'garage_sort_key', 'VARCHAR(255)')
+    _add_column(connection, 'entries', 'power_kw', 'FLOAT')
+    _add_column(connection, 'inspection_checklists', 'version', 'INTEGER NOT NULL DEFAULT 1')
+    _add_column(connection, 'inspection_items', 'version', 'INTEGER NOT NULL DEFAULT 1')
+    _add_column(connection, 'inspection_item_changes', 'checklist_version', 'INTEGER')
+    _add_column(connection, 'entry_status', 'weight_kg', 'FLOAT')
+
+
+@migration(8, "Index entries by vehicle and garage number sort keys")
+def index_entry_sort_keys(connection):
+    _create_index(connection, 'entries', 'ix_entries_vehicle_sort_key', ['vehicle_sort_key', 'id'])
+    _create_index(connection, 'entries', 'ix_entries_garage_sort_key', ['garage_sort_key', 'vehicle_sort_key'])
+
+
+@migration(9, "Fill in the vehicle and garage number sort keys")
+def backfill_entry_sort_keys(connection):
+    entries = table('entries', column('id'), column('vehicle_number'), column('garage_number'),
+                    column('vehicle_sort_key'), column('garage_sort_key'))
+    rows = connection.execute(select(entries.c.id, entries.c.vehicle_number, entries.c.garage_number)
+                              .where(entries.c.vehicle_sort_key == None)).all()
+    for row in rows:
+        connection.execute(update(entries).where(entries.c.id == row.id).values(
+            vehicle_sort_key=natural_sort_key(row.vehicle_number), garage_sort_key=natural_sort_key(row.garage_number)))
+
+
+@migration(10, "Allow one checklist per entry")
+def unique_checklists(connection):
+    # A database that already holds duplicates keeps working without the index, see 'flask dedupe-checklists'
+    duplicates = connection.execute(text(
+        "SELECT entry_id FROM inspection_checklists GROUP BY entry_id HAVING COUNT(id) > 1")).scalars().all()
+    if duplicates:
+        print(f"Warning: entries {duplicates} have more than one checklist, "
+              f"run 'flask dedupe-checklists' to enable the unique checklist index.")
+        return
+    _create_index(connection, 'inspection_checklists', 'ix_inspection_checklists_entry_id', ['entry_id'], unique=True)
+
+
+@migration(11, "Start the data version the report cache checks")
+def data_version_row(connection):
+    meta = table('app_meta', column('key'), column('value'))
+    if connection.execute(select(meta.c.key).where(meta.c.key == 'data_version')).first() is None:
+        connection.execute(insert(meta).values(key='data_version', value=1))
+
+
+# External content FTS5 index over entries, kept in sync by triggers so every write path is covered
+SEARCH_COLUMNS = ['driver_name', 'vehicle_number', 'vehicle_make', 'vehicle_model']
+SEARCH_INDEX_DDL = [
+    f"""CREATE VIRTUAL TABLE entries_fts USING fts5(
+        {', '.join(SEARCH_COLUMNS)},
+        content='entries', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='1 2 3'
+    )""",
+    "CREATE VIRTUAL TABLE entries_fts_vocab USING fts5vocab(entries_fts, 'row')",
+    f"""CREATE TRIGGER entries_fts_insert AFTER INSERT ON entries BEGIN
+        INSERT INTO entries_fts(rowid, {', '.join(SEARCH_COLUMNS)})
+        VALUES (new.id, {', '.join('new.' + name for name in SEARCH_COLUMNS)});
+    END""",
+    f"""CREATE TRIGGER entries_fts_delete AFTER DELETE ON entries BEGIN
+        INSERT INTO entries_fts(entries_fts, rowid, {', '.join(SEARCH_COLUMNS)})
+        VALUES ('delete', old.id, {', '.join('old.' + name for name in SEARCH_COLUMNS)});
+    END""",
+    f"""CREATE TRIGGER entries_fts_update AFTER UPDATE ON entries BEGIN
+        INSERT INTO entries_fts(entries_fts, rowid, {', '.join(SEARCH_COLUMNS)})
+        VALUES ('delete', old.id, {', '.join('old.' + name for name in SEARCH_COLUMNS)});
+        INSERT INTO entries_fts(rowid, {', '.join(SEARCH_COLUMNS)})
+        VALUES (new.id, {', '.join('new.' + name for name in SEARCH_COLUMNS)});
+    END""",
+    "INSERT INTO entries_fts(entries_fts) VALUES ('rebuild')",
+]
+
+
+@migration(12, "Full-text search index over entries (SQLite only)")
+def search_index(connection):
+    if connection.dialect.name != 'sqlite' or inspect(connection).has_table('entries_fts'):
+        return
+    for statement in SEARCH_INDEX_DDL:
+        connection.execute(text(statement))
+
+
+# Derived data is rebuilt with the current code, so these come after every column it writes
+
+@migration(13, "Fill the entry_status inspection summary")
+def fill_entry_status(connection):
+    from status import refresh_entry_status  # Imports the app's query code, only needed here
+    with Session(bind=connection) as session:
+        refresh_entry_status(session=session)
+        session.flush()  # The migration's transaction commits it
+
+
+# Tables the checklist templates are built from, see checklists.template_items
+TEMPLATE_TABLES = ['checklist_items', 'entry_classes', 'checklist_item_classes']
+
+
+def template_version_triggers(connection):
+    """
+    SQLite triggers bumping the template version on any write to the template tables, so
+    edits made with plain SQL reach the template cache of every running worker too.
+    """
+    if connection.dialect.name != 'sqlite':
+        return
+    for table_name in TEMPLATE_TABLES:
+        for operation in ('INSERT', 'UPDATE', 'DELETE'):
+            connection.execute(text(
+                f"""CREATE TRIGGER IF NOT EXISTS {table_name}_template_version_{operation.lower()}
+                AFTER {operation} ON {table_name} BEGIN
+                    UPDATE app_meta SET value = value + 1 WHERE key = 'template_version';
+                END"""))
+
+
+@migration(14, "Version the checklist templates so every worker reloads them after a change")
+def template_version(connection):
+    meta = table('app_meta', column('key'), column('value'))
+    if connection.execute(select(meta.c.key).where(meta.c.key == 'template_version')).first() is None:
+        connection.execute(insert(meta).values(key='template_version', value=1))
+    template_version_triggers(connection)
+
+
+@migration(15, "Stamp inspection summary rows with the data version that wrote them")
+def entry_status_data_version(connection):
+    _add_column(connection, 'entry_status', 'data_version', 'INTEGER')
+    _create_index(connection, 'entry_status', 'ix_entry_status_data_version', ['data_version'])
+
+
+def applied_migrations(engine):
+    """
+    {version: (description, applied_at)} for the migrations recorded in the database.
+    """
+    if not inspect(engine).has_table(SchemaMigration.__tablename__):
+        return {}
+    table = SchemaMigration.__table__
+    with engine.connect() as connection:
+        return {row.version: (row.description, row.applied_at) for row in connection.execute(select(table))}
+
+
+def migrate(engine):
+    """
+    Create the tables the database doesn't have yet from the models, then apply every
+    migration it hasn't had yet, each in its own transaction together with its
+    schema_migrations row. Returns the (version, description) pairs applied.
+    """
+    db.metadata.create_all(engine)  # New tables come complete, the migrations skip what they already have
+    done = applied_migrations(engine)
+    unknown = sorted(set(done) - {version for version, _, _ in MIGRATIONS})
+    if unknown:
+        print(f"Warning: database has migrations {unknown} that this code doesn't know about.")
+
+    applied = []
+    for version, description, upgrade in MIGRATIONS:
+        if version in done:
+            continue
+        with engine.begin() as connection:
+            upgrade(connection)
+            connection.execute(SchemaMigration.__table__.insert().values(
+                version=version, description=description, applied_at=datetime.now()))
+        applied.append((version, description))
+    return applied
+
+
+def migration_status(engine):
+    """
+    Every known migration as (version, description, applied_at or None).
+    """
+    done = applied_migrations(engine)
+    return [(version, description, done.get(version, (None, None))[1]) for version, description, _ in MIGRATIONS]
+
+
+def print_migration_status(engine):
+    for version, description, applied_at in migration_status(engine):
+        print(f"{version:4d}  {'applied ' + applied_at.strftime('%Y-%m-%d %H:%M') if applied_at else 'pending':24}  {description}")
+
+
+# Offline runner, no app needed: python migrations.py [--list] [DATABASE_URL]
+if __name__ == '__main__':
+    from config import SQLALCHEMY_DATABASE_URI
+    args = [arg for arg in sys.argv[1:] if arg != '--list']
+    engine = create_engine(args[0] if args else SQLALCHEMY_DATABASE_URI)
+    try:
+        if '--list' not in sys.argv:
+            for version, description in migrate(engine):
+                print(f"Applied {version}: {description}")
+        print_migration_status(engine)
+    finally:
+        engine.dispose()
@@ -1,8 +1,45 @@
+import enum
+import re
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
+from sqlalchemy import event
 
 db = SQLAlchemy()
 
+class ItemKind(enum.IntEnum):
+    """
+    What a checklist row holds, stored on checklist_items and copied to each inspection item.
+    Only STATUS and APPROVAL rows are Pass/Fail results, the others record data.
+    """
+    STATUS = 0  # Pass/Fail/NA inspection result
+    APPROVAL = 1  # "Approved to Start", the overall result
+    WEIGHT = 2  # Numeric vehicle weight in the item value
+    SCRUTINEER_NAME = 3  # The rest mirror checklist fields
+    SCRUTINEER_LICENCE = 4
+    DATE = 5
+    TIME = 6
+
+# Kinds counted as inspection results (failed/pending/outstanding), the rest are metadata
+RESULT_KINDS = (ItemKind.STATUS, ItemKind.APPROVAL)
+
+def normalize_class(class_name):
+    """
+    Store a class the way the add entry form does: 'Pro Am' -> 'pro_am'.
+    """
+    return class_name.strip().replace(' ', '_').lower()
+
+def natural_sort_key(value):
+    """
+    Build a sort key that orders vehicle/garage numbers naturally (2 < 10 < 10A < 10PA < 11).
+    The leading number is zero padded and any suffix is kept, numbers without digits sort last.
+    """
+    if value is None or not value.strip():
+        return None
+    digits, suffix = re.match(r'(\d*)(.*)', value.strip().upper()).groups()
+    if not digits:
+        return '~' + suffix
+    return f"{int(digits):010d}{suffix}"
+
 # User Models for Auth
 class User(db.Model, UserMixin):
     __tablename__ = 'users'  # Matches your SQLite table name
@@ -34,21 +71,40 @@ class Entry(db.Model):
     Inspection_report = db.Column(db.Boolean, nullable=False, default=False)
     approved_to_start = db.Column(db.Boolean, nullable=False, default=False)
     failed_items = db.Column(db.Boolean, nullable=False, default=False)
+    vehicle_sort_key = db.Column(db.String(64), nullable=True)  # natural_sort_key(vehicle_number)
+    garage_sort_key = db.Column(db.String(255), nullable=True)  # natural_sort_key(garage_number)
+    power_kw = db.Column(db.Float, nullable=True)  # Declared power, for power-to-weight
+
+    # Indexes for the vehicle/garage number ordering used by every list page,
+    # and for the per-class entry counts on the dashboard
+    __table_args__ = (
+        db.Index('ix_entries_vehicle_sort_key', 'vehicle_sort_key', 'id'),
+        db.Index('ix_entries_garage_sort_key', 'garage_sort_key', 'vehicle_sort_key'),
+        db.Index('ix_entries_type_class', 'vehicle_type', 'class_type'),
+    )
 
     # Relationships
     inspection_checklist = db.relationship('InspectionChecklist', backref='entry', lazy=True)
 
+# Keep the sort keys in step with the numbers on every insert/update
+@event.listens_for(Entry, 'before_insert')
+@event.listens_for(Entry, 'before_update')
+def set_entry_sort_keys(mapper, connection, target):
+    target.vehicle_sort_key = natural_sort_key(target.vehicle_number)
+    target.garage_sort_key = natural_sort_key(target.garage_number)
+
 # Inspection Checklist Model
 class InspectionChecklist(db.Model):
     __tablename__ = 'inspection_checklists'
 
     id = db.Column(db.Integer, primary_key=True)  # Unique ID for the checklist
-    entry_id = db.Column(db.Integer, db.ForeignKey('entries.id'), nullable=False)  # Links to the 'entries' table
+    entry_id = db.Column(db.Integer, db.ForeignKey('entries.id'), nullable=False, unique=True, index=True)  # Links to the 'entries' table, one checklist per entry
     approved_to_start = db.Column(db.Boolean, default=False)
     scrutineer_name = db.Column(db.String(255), nullable=True)  # Add this column
     scrutineer_licence_number = db.Column(db.String(255), nullable=True)  # Add this column
     date = db.Column(db.Date, nullable=True)  # Add this column if not already present
     time = db.Column(db.Time, nullable=True)  # Add this column if not already present
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')  # Bumped on every save, checked to catch stale forms
 
     # Relationships
     items = db.relationship('InspectionItem', backref='checklist', lazy=True)
@@ -59,6 +115,8 @@ class InspectionItem(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     checklist_id = db.Column(db.Integer, db.ForeignKey('inspection_checklists.id'), nullable=False)
+    checklist_item_id = db.Column(db.Integer, db.ForeignKey('checklist_items.id'), nullable=True)  # Template the item was created from
+    kind = db.Column(db.SmallInteger, nullable=False, default=ItemKind.STATUS, server_default='0')  # ItemKind
     item_name = db.Column(db.String(255), nullable=False)
     status = db.Column(db.String(50), nullable=False, default='Pending')
     brand = db.Column(db.String(255), nullable=True)
@@ -70,6 +128,12 @@ class InspectionItem(db.Model):
     expiry_date_required = db.Column(db.Boolean, default=False)
     rops_required = db.Column(db.Boolean, default=False)
     value = db.Column(db.String(255), nullable=True)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')  # Bumped on every change, used to detect conflicting edits
+
+    # Items of a checklist, looked up by kind (approval, weight) and status
+    __table_args__ = (
+        db.Index('ix_inspection_items_checklist_kind', 'checklist_id', 'kind', 'status'),
+    )
 
 # Checklist Item Model
 class ChecklistItem(db.Model):
@@ -77,25 +141,39 @@ class ChecklistItem(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)  # Unique ID for the checklist item
     item_name = db.Column(db.String(255), nullable=False)  # Name of the inspection item
-    applicable_to_tuner = db.Column(db.Boolean, default=False)
-    applicable_to_clubsprint = db.Column(db.Boolean, default=False)
-    applicable_to_open = db.Column(db.Boolean, default=False)
-    applicable_to_pro_open = db.Column(db.Boolean, default=False)
-    applicable_to_pro_am = db.Column(db.Boolean, default=False)
-    applicable_to_pro = db.Column(db.Boolean, default=False)
-    applicable_to_flying_500 = db.Column(db.Boolean, default=False)
-    applicable_to_demo = db.Column(db.Boolean, default=False)
+    kind = db.Column(db.SmallInteger, nullable=False, default=ItemKind.STATUS, server_default='0')  # ItemKind
     brand_required = db.Column(db.Boolean, default=False)
     standard_required = db.Column(db.Boolean, default=False)
     expiry_date_required = db.Column(db.Boolean, default=False)
     rops_required = db.Column(db.Boolean, default=False)
+    # The applicable_to_<class> columns of older databases are replaced by checklist_item_classes
+
+    # Classes this item is inspected for
+    classes = db.relationship('EntryClass', secondary='checklist_item_classes', backref='checklist_items', lazy=True)
+
+# Entry Class Model (the classes entries can be entered in, in form order)
+class EntryClass(db.Model):
+    __tablename__ = 'entry_classes'
+
+    id = db.Column(db.Integer, primary_key=True)
+    code = db.Column(db.String(50), nullable=False, unique=True)  # As stored in entries.class_type, e.g. 'pro_am'
+    name = db.Column(db.String(100), nullable=False)  # As shown on the forms, e.g. 'Pro Am'
+    position = db.Column(db.Integer, nullable=False, default=0)
+
+# Which checklist items apply to which class, keyed class first for the per-class template lookup
+checklist_item_classes = db.Table(
+    'checklist_item_classes',
+    db.Column('class_id', db.Integer, db.ForeignKey('entry_classes.id'), primary_key=True),
+    db.Column('checklist_item_id', db.Integer, db.ForeignKey('checklist_items.id'), primary_key=True),
+)
+
 # Officials Model
 class Officials(db.Model):
     __tablename__ = 'officials'  # Make sure this matches your database table name
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
-    role = db.Column(db.String(50), nullable=False)
+    role = db.Column(db.String(50), nullable=False, index=True)
     contact_info = db.Column(db.String(200), nullable=True)
     licence_number = db.Column(db.String(25), nullable=True)
    
@@ -104,3 +182,65 @@ class Roles(db.Model):
     __tablename__ = 'roles'
     id = db.Column(db.Integer, primary_key=True)
     role_name = db.Column(db.String(100), nullable=False, unique=True)
+
+# Entry Status Model (per-entry inspection summary, maintained by status.py)
+class EntryStatus(db.Model):
+    __tablename__ = 'entry_status'
+
+    entry_id = db.Column(db.Integer, db.ForeignKey('entries.id'), primary_key=True)
+    checklist_id = db.Column(db.Integer, nullable=True, index=True)  # NULL until the vehicle is presented
+    approved_to_start = db.Column(db.Boolean, nullable=False, default=False)
+    approval_status = db.Column(db.String(50), nullable=True, index=True)  # Status of the "Approved to Start" item
+    failed_count = db.Column(db.Integer, nullable=False, default=0, index=True)
+    pending_count = db.Column(db.Integer, nullable=False, default=0)
+    na_count = db.Column(db.Integer, nullable=False, default=0)
+    outstanding_items = db.Column(db.Text, nullable=True)  # Comma separated names of Pending/Fail items
+    vehicle_weight = db.Column(db.String(255), nullable=True)
+    weight_kg = db.Column(db.Float, nullable=True, index=True)  # vehicle_weight as a number, NULL when it isn't one
+    data_version = db.Column(db.Integer, nullable=True, index=True)  # Data version of the commit that last wrote the row
+
+    # Checked-in entries not yet approved, for the not approved counter
+    __table_args__ = (
+        db.Index('ix_entry_status_approved', 'approved_to_start', 'checklist_id'),
+    )
+
+    # Relationships
+    entry = db.relationship('Entry', backref=db.backref('status', uselist=False, lazy=True))
+
+# Inspection Item Change Model (audit trail of checklist saves)
+class InspectionItemChange(db.Model):
+    __tablename__ = 'inspection_item_changes'
+
+    id = db.Column(db.Integer, primary_key=True)
+    checklist_id = db.Column(db.Integer, db.ForeignKey('inspection_checklists.id'), nullable=False, index=True)
+    item_id = db.Column(db.Integer, nullable=True)  # NULL for checklist-level fields (scrutineer, date, time)
+    field = db.Column(db.String(50), nullable=False)
+    old_value = db.Column(db.String(255), nullable=True)
+    new_value = db.Column(db.String(255), nullable=True)
+    changed_by = db.Column(db.String(80), nullable=True)
+    changed_at = db.Column(db.DateTime, nullable=False)
+    checklist_version = db.Column(db.Integer, nullable=True)  # Checklist version the change produced
+
+# Checklist Sync Edit Model (edits already applied through the tablet sync API)
+class ChecklistSyncEdit(db.Model):
+    __tablename__ = 'checklist_sync_edits'
+
+    edit_id = db.Column(db.String(64), primary_key=True)  # Generated by the tablet, makes retries idempotent
+    checklist_id = db.Column(db.Integer, db.ForeignKey('inspection_checklists.id'), nullable=False)
+    result = db.Column(db.String(20), nullable=False)  # applied or conflict
+    synced_at = db.Column(db.DateTime, nullable=False)
+
+# App Meta Model (named counters shared by every worker, e.g. the data version the report cache checks)
+class AppMeta(db.Model):
+    __tablename__ = 'app_meta'
+
+    key = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+
+# Schema Migration Model (one row per migration in migrations.py applied to this database)
+class SchemaMigration(db.Model):
+    __tablename__ = 'schema_migrations'
+
+    version = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    description = db.Column(db.String(255), nullable=False)
+    applied_at = db.Column(db.DateTime, nullable=False)
@@ -0,0 +1,39 @@
+# routes/__init__.py
+from functools import wraps
+from flask import current_app, flash, redirect, url_for
+from flask_login import current_user
+from models import Entry
+
+# Blueprint modules, imported and registered by register_blueprints()
+BLUEPRINTS = ['auth', 'entries', 'checklists', 'reports', 'admin', 'api', 'formula_ford']
+
+
+def register_blueprints(app):
+    """
+    Import each blueprint module listed in BLUEPRINTS and register it on the app.
+    """
+    from importlib import import_module
+    for name in BLUEPRINTS:
+        app.register_blueprint(import_module(f'routes.{name}').bp)
+
+
+# Diagnostic output, only printed when running with FLASK_DEBUG=1
+def debug_print(*args):
+    if current_app.debug:
+        print(*args)
+
+# admin required decorator
+def admin_required(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not current_user.is_authenticated or current_user.role.lower() != 'admin':
+            flash('You do not have permission to access this page.', 'danger')
+            return redirect(url_for('entries.index'))
+        return f(*args, **kwargs)
+    return decorated_function
+
+# Sort order for the list pages: vehicle number, or garage number when requested
+def entry_order_by(order_by='vehicle_number'):
+    if order_by == 'garage_number':
+        return (Entry.garage_sort_key, Entry.vehicle_sort_key)
+    return (Entry.vehicle_sort_key, Entry.id)
@@ -0,0 +1,143 @@
+# routes/admin.py
+from flask import Blueprint, current_app, render_template, request, flash, redirect, url_for, stream_with_context
+from models import db, Officials, Roles
+from checklists import provision_checklists
+import importer
+from export import EXPORT_FORMATS, export_chunks
+from routes import admin_required
+
+bp = Blueprint('admin', __name__)
+
+# Route: Print Scrut
+@bp.route('/scrutineers')
+@admin_required
+def scrutineers_list():
+    scrutineers = Officials.query.filter_by(role="Scrutineer").all()
+    return render_template('scrutineers.html', scrutineers=scrutineers)
+
+# Route: Add Officals
+@bp.route('/add_official', methods=['GET', 'POST'])
+@admin_required
+def add_official():
+    if request.method == 'POST':
+        # Get data from the form
+        name = request.form.get('name')
+        role = request.form.get('role')
+        licence_number = request.form.get('licence_number')
+        contact_info = request.form.get('contact_info')
+
+        # Validate required fields
+        if not name or not role or not licence_number:
+            roles = Roles.query.all()
+            return render_template('add_official.html', error="Please fill in all required fields.", roles=roles)
+
+        # Create a new Official object
+        new_official = Officials(
+            name=name,
+            role=role,
+            licence_number=licence_number,
+            contact_info=contact_info,
+        )
+
+        try:
+            db.session.add(new_official)
+            db.session.commit()
+            return redirect('/add_official')
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error: {e}")
+            roles = Roles.query.all()
+            return render_template('add_official.html', error="Failed to add official. Please try again.", roles=roles)
+
+    # Handle GET request
+    roles = Roles.query.all()
+    return render_template('add_official.html', roles=roles)
+
+# Route: Admin Provision Checklists for all entries not yet presented
+@bp.route('/provision_checklists', methods=['POST'])
+@admin_required
+def provision_checklists_route():
+    try:
+        count = provision_checklists()
+        flash(f"Created {count} checklists.", "success")
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error provisioning checklists: {e}")
+        flash("Failed to create checklists. Please try again.", "danger")
+    return redirect(url_for('entries.index'))
+
+# Route: Admin Export entries, checklists or inspection items (CSV or Parquet download)
+@bp.route('/export')
+@admin_required
+def export_data():
+    dataset = request.args.get('dataset', 'entries')
+    format = request.args.get('format', 'csv')
+    try:
+        chunks = export_chunks(dataset, format,
+                               class_type=request.args.get('class') or None,
+                               status=request.args.get('status') or None)
+    except (ValueError, RuntimeError) as e:
+        flash(str(e), "danger")
+        return redirect(url_for('entries.index'))
+
+    # Rows are read from the database as the download is sent, never all at once
+    mimetype, extension = EXPORT_FORMATS[format]
+    response = current_app.response_class(stream_with_context(chunks), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="{dataset}.{extension}"'
+    return response
+
+# Route: Admin View/Delete Entries
+@bp.route("/manage_entries")
+@admin_required
+def manage_entries():
+    raise NotImplementedError("This route is not implemented yet.")
+
+# Route: Admin View/Delete Checklists
+@bp.route("/manage_checklists")
+@admin_required
+def manage_checklists():
+    raise NotImplementedError("This route is not implemented yet.")
+
+# Route: Admin View/Delete Officials
+@bp.route("/manage_officials")
+@admin_required
+def manage_officials():
+    raise NotImplementedError("This route is not implemented yet.")
+
+# Route: Admin Import CSV to Entries
+@bp.route('/import_entries', methods=['GET', 'POST'])
+@admin_required
+def import_entries():
+    return import_csv_page('entries')
+
+# Route: Admin Import CSV to Officials
+@bp.route('/import_officials', methods=['GET', 'POST'])
+@admin_required
+def import_officials():
+    return import_csv_page('officials')
+
+def import_csv_page(kind):
+    # Upload form on GET, on POST stream the file through the importer and show its report
+    if request.method == 'GET':
+        return render_template('import.html', kind=kind)
+
+    upload = request.files.get('csv_file')
+    if not upload or not upload.filename:
+        return render_template('import.html', kind=kind, error="Please choose a CSV file.")
+
+    dry_run = bool(request.form.get('dry_run'))
+    try:
+        if kind == 'entries':
+            report = importer.import_entries(importer.open_csv(upload.stream), dry_run=dry_run,
+                                             provision=bool(request.form.get('provision')))
+        else:
+            report = importer.import_officials(importer.open_csv(upload.stream), dry_run=dry_run)
+    except (ValueError, UnicodeDecodeError) as e:
+        db.session.rollback()
+        return render_template('import.html', kind=kind, error=f"Could not read the CSV: {e}")
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error importing {kind}: {e}")
+        return render_template('import.html', kind=kind, error="Import failed. Rows up to the last completed batch were saved.")
+
+    return render_template('import.html', kind=kind, report=report)
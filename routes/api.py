@@ -0,0 +1,295 @@
+# routes/api.py
+# JSON endpoints used by the dashboard, the lookup pages and the tablets
+import base64
+import hashlib
+import json
+import threading
+import time
+from flask import Blueprint, current_app, jsonify, request, flash
+from flask_login import login_required, current_user
+from sqlalchemy import or_, and_
+from models import db, Entry, EntryStatus, normalize_class
+from search import ranked_matches
+from status import refresh_entry_status, dashboard_counters
+from checklists import entry_classes, sync_checklist_edits
+from cache import cached_report, data_version
+from weights import parse_power, weight_analytics
+
+bp = Blueprint('api', __name__)
+
+# Short-lived cache of search API responses: (query, limit, cursor) -> (expires, etag, body)
+search_cache = {}
+search_cache_lock = threading.Lock()
+SEARCH_CACHE_MAX_ENTRIES = 500
+
+# Keyset pagination cursor for the search API, the (rank, id) of the last row sent
+def encode_search_cursor(rank, entry_id):
+    return base64.urlsafe_b64encode(json.dumps([rank, entry_id]).encode()).decode()
+
+def decode_search_cursor(cursor):
+    rank, entry_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    if not isinstance(rank, (int, float, str)):
+        raise ValueError("Invalid rank")
+    return rank, int(entry_id)
+
+# Endpoint: Type-ahead entry search (JSON)
+@bp.route('/api/entries/search', methods=['GET'])
+@login_required
+def api_search_entries():
+    search_query = request.args.get('q', '').strip()
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+    cursor = request.args.get('cursor', '')
+    # Keyed on the data version too, so a write shows up at once on every worker
+    cache_key = (data_version(), search_query.lower(), limit, cursor)
+
+    # Serve repeated queries from memory without touching the entries
+    now = time.monotonic()
+    with search_cache_lock:
+        cached = search_cache.get(cache_key)
+    if cached and cached[0] > now:
+        _, etag, body = cached
+    else:
+        rows = []
+        ranked = ranked_matches(search_query)
+        if ranked is not None:
+            # Same order as the lookup pages: best match first
+            query = db.session.query(
+                Entry.id,
+                Entry.vehicle_number,
+                Entry.driver_name,
+                Entry.vehicle_make,
+                Entry.vehicle_model,
+                Entry.class_type,
+                Entry.garage_number,
+                EntryStatus.checklist_id,
+                ranked.c.rank
+            ).join(ranked, ranked.c.entry_id == Entry.id) \
+             .outerjoin(EntryStatus, Entry.id == EntryStatus.entry_id)
+
+            if cursor:
+                try:
+                    last_rank, last_id = decode_search_cursor(cursor)
+                except (ValueError, TypeError):
+                    return jsonify({'error': "Invalid cursor."}), 400
+                query = query.filter(or_(ranked.c.rank > last_rank, and_(ranked.c.rank == last_rank, Entry.id > last_id)))
+
+            # Fetch one extra row to know whether there is a next page
+            rows = query.order_by(ranked.c.rank, Entry.id).limit(limit + 1).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_search_cursor(rows[-1].rank, rows[-1].id)
+
+        body = json.dumps({
+            'results': [
+                {
+                    'id': row.id,
+                    'vehicle_number': row.vehicle_number,
+                    'driver_name': row.driver_name,
+                    'vehicle_make': row.vehicle_make,
+                    'vehicle_model': row.vehicle_model,
+                    'class_type': row.class_type,
+                    'garage_number': row.garage_number,
+                    'checklist_id': row.checklist_id
+                }
+                for row in rows
+            ],
+            'next_cursor': next_cursor
+        }, separators=(',', ':'))
+        etag = hashlib.sha1(body.encode()).hexdigest()
+
+        with search_cache_lock:
+            if len(search_cache) >= SEARCH_CACHE_MAX_ENTRIES:
+                # Drop expired responses, or everything if none have expired yet
+                expired = [key for key, value in search_cache.items() if value[0] <= now]
+                for key in expired or list(search_cache):
+                    del search_cache[key]
+            search_cache[cache_key] = (now + current_app.config['SEARCH_CACHE_SECONDS'], etag, body)
+
+    response = current_app.response_class(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.max_age = current_app.config['SEARCH_CACHE_SECONDS']
+    return response.make_conditional(request)
+
+# Endpoint: Sync queued checklist edits from tablets (JSON)
+@bp.route('/api/checklists/sync', methods=['POST'])
+@login_required
+def api_sync_checklists():
+    payload = request.get_json(silent=True)
+    edits = payload.get('edits') if isinstance(payload, dict) else None
+    if not isinstance(edits, list):
+        return jsonify({'error': "Expected a JSON body with an 'edits' list."}), 400
+
+    try:
+        result = sync_checklist_edits(edits, changed_by=current_user.username)
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error syncing checklist edits: {e}")
+        return jsonify({'error': "Failed to sync checklist edits."}), 500
+
+    # The checklist pages show the usual message on the page they return to
+    if payload.get('flash') and result['applied'] and not result['conflicts']:
+        flash("Checklist updated successfully!", "success")
+    return jsonify(result)
+
+# Route: Denied Start Counter
+@bp.route('/denied_start_count')
+@login_required
+@cached_report
+def denied_start_count():
+    # Count vehicles where "Approved to Start" is "Fail"
+
+    count = EntryStatus.query.filter(EntryStatus.approval_status == "Fail").count()
+
+    # Return the count as JSON
+    return jsonify({'denied_start_count': count})
+
+# Endpoint: Get total entries with vehicle_type 'W'
+@bp.route('/total_entries', methods=['GET'])
+@login_required
+@cached_report
+def total_entries():
+    total = Entry.query.filter_by(vehicle_type='W').count()
+    return jsonify({'total_entries': total})
+
+# Endpoint: Get total entries per class
+@bp.route('/class_entries', methods=['GET'])
+@login_required
+@cached_report
+def class_entries():
+    entries = db.session.query(Entry.class_type, db.func.count(Entry.class_type)) \
+                        .filter_by(vehicle_type='W') \
+                        .group_by(Entry.class_type) \
+                        .all()
+    return jsonify({'class_entries': [{row[0]: row[1]} for row in entries]})
+
+# Endpoint: Get total entries without inspection reports
+@bp.route('/missing_inspections', methods=['GET'])
+@login_required
+@cached_report
+def missing_inspections():
+    # Query entries without matching checklists
+    entries = db.session.query(EntryStatus.entry_id).filter(
+        EntryStatus.checklist_id == None
+    ).all()
+    return jsonify({'missing_inspections': [entry[0] for entry in entries]})
+
+# Endpoint: Get total entries not approved to start
+@bp.route('/not_approved_to_start', methods=['GET'])
+@login_required
+@cached_report
+def not_approved_to_start():
+    try:
+        # Query entries where approved_to_start is FALSE
+        not_approved_entries = db.session.query(EntryStatus.entry_id).filter(
+            EntryStatus.checklist_id != None,
+            EntryStatus.approved_to_start == False
+        ).all()
+
+        # Extract the IDs into a list
+        not_approved_entry_ids = [entry[0] for entry in not_approved_entries]
+
+        # Return the count and IDs of entries without approval to start
+        return jsonify({
+            'not_approved_to_start_count': len(not_approved_entry_ids),
+            'not_approved_entries': not_approved_entry_ids
+        })
+
+    except Exception as e:
+        # Handle any errors
+        return jsonify({'error': str(e)})
+
+# Endpoint: Get total entries with failed items
+@bp.route('/failed_items', methods=['GET'])
+@login_required
+@cached_report
+def failed_items():
+    try:
+        # Query entries that have at least one failed item
+        failed_entries = db.session.query(EntryStatus.entry_id).filter(
+            EntryStatus.failed_count > 0
+        ).all()
+
+        # Extract the IDs into a list
+        failed_entry_ids = [entry[0] for entry in failed_entries]
+
+        # Return the count and IDs of entries with failed items
+        return jsonify({
+            'failed_items_count': len(failed_entry_ids),
+            'failed_entries': failed_entry_ids
+        })
+
+    except Exception as e:
+        # Handle any errors
+        return jsonify({'error': str(e)})
+
+# Endpoint: All dashboard counters in one request
+# The per-counter endpoints above are kept for fetching the entry IDs on demand
+@bp.route('/dashboard_stats', methods=['GET'])
+@login_required
+@cached_report
+def dashboard_stats():
+    return jsonify(dashboard_counters())
+
+# Endpoint: Vehicle weights recorded at scrutineering (JSON)
+@bp.route('/vehicles_by_weight', methods=['GET'])
+@login_required
+@cached_report
+def vehicles_by_weight():
+    # Heaviest first, recorded weights that aren't a number last
+    vehicles = db.session.query(Entry.driver_name, Entry.vehicle_number, EntryStatus.vehicle_weight, EntryStatus.weight_kg) \
+        .join(EntryStatus, Entry.id == EntryStatus.entry_id) \
+        .filter(EntryStatus.vehicle_weight != None) \
+        .order_by(EntryStatus.weight_kg == None, EntryStatus.weight_kg.desc(), Entry.vehicle_sort_key, Entry.id).all()
+    return jsonify({'vehicles_by_weight': [
+        {'driver': vehicle.driver_name, 'vehicle_number': vehicle.vehicle_number, 'weight': vehicle.vehicle_weight,
+         'weight_kg': vehicle.weight_kg}
+        for vehicle in vehicles
+    ]})
+
+# Endpoint: Per-class weight statistics and vehicles under their class minimum (JSON)
+@bp.route('/api/weights/analytics', methods=['GET'])
+@login_required
+@cached_report
+def api_weight_analytics():
+    return jsonify(weight_analytics(current_app.config['CLASS_MINIMUM_WEIGHTS']))
+
+# Endpoint: Add a new entry (JSON)
+@bp.route('/api/entries', methods=['POST'])
+@login_required
+def api_add_entry():
+    data = request.get_json(silent=True) or {}
+    required = ['vehicle_number', 'vehicle_make', 'vehicle_model', 'driver_name', 'class']
+    missing = [field for field in required if not data.get(field)]
+    if missing:
+        return jsonify({'error': f"Missing required fields: {', '.join(missing)}"}), 400
+    if data.get('power_kw') not in (None, '') and parse_power(data['power_kw']) is None:
+        return jsonify({'error': "power_kw must be a number of kW."}), 400
+    class_type = normalize_class(str(data['class']))
+    if class_type not in {code for code, name in entry_classes()}:
+        return jsonify({'error': f"Unknown class {data['class']!r}."}), 400
+
+    new_entry = Entry(
+        vehicle_number=data['vehicle_number'],
+        vehicle_make=data['vehicle_make'],
+        vehicle_model=data['vehicle_model'],
+        garage_number=data.get('garage_number'),
+        log_book_number=data.get('log_book_number'),
+        licence_number=data.get('licence_number') or '000000',
+        driver_name=data['driver_name'],
+        team_name=data.get('team_name'),
+        power_kw=parse_power(data.get('power_kw')),
+        class_type=class_type,
+        vehicle_type='W'  # All entries have vehicle_type = 'W'
+    )
+    try:
+        db.session.add(new_entry)
+        db.session.flush()
+        refresh_entry_status([new_entry.id])
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error adding entry: {e}")
+        return jsonify({'error': "Failed to add entry."}), 500
+    return jsonify({'message': 'Entry added successfully!', 'id': new_entry.id}), 201
@@ -0,0 +1,36 @@
+# routes/auth.py
+from flask import Blueprint, render_template, request, flash, redirect, url_for
+from flask_login import login_user, logout_user, login_required
+from models import User
+from auth import check_password
+
+bp = Blueprint('auth', __name__)
+
+# Route: Login (GET AND POST)
+@bp.route('/login', methods=['GET', 'POST'])
+def login():
+    if request.method == 'POST':
+        username = request.form['username']
+        plain_password = request.form['password']
+        user = User.query.filter_by(username=username).first()
+
+        if user and check_password(plain_password, user.password):  # hashed password check
+            login_user(user)
+            return redirect(url_for('entries.index'))  # Redirect to the dashboard after login
+        else:
+            flash("Invalid username or password.", "danger")
+            return redirect(url_for('auth.login'))
+        
+    return render_template('login.html')  # Render login form
+
+# Route: Logout
+@bp.route('/logout')
+@login_required
+def logout():
+    logout_user()
+    return redirect(url_for('auth.login'))  # Redirect to login page after logout
+
+# Route: Register
+@bp.route('/register')
+def register():
+    return render_template('register.html')
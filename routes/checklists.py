@@ -0,0 +1,161 @@
+# routes/checklists.py
+# Inspection checklist pages and form saves
+from datetime import datetime
+from flask import Blueprint, current_app, render_template, jsonify, request, flash, redirect, url_for, send_from_directory
+from flask_login import login_required, current_user
+from models import db, Entry, InspectionChecklist, InspectionItem, Officials
+from checklists import get_or_create_checklist, save_checklist, ChecklistConflict
+from routes import debug_print
+
+bp = Blueprint('checklists', __name__)
+
+# Route: View Checklist (GET & POST)
+@bp.route('/view_checklist', methods=['GET', 'POST'])
+@login_required
+def view_checklist():
+    if request.method == 'POST':
+        entry_id = request.form.get('entry_id')  # Get entry_id from the form
+        debug_print(f"Received entry_id: {entry_id}")
+
+        entry = db.session.get(Entry, entry_id)  # Retrieve the entry
+        if not entry:
+            return jsonify({'error': "Entry not found!"}), 404
+
+        debug_print(f"Found entry: {entry}")
+
+        # Fetch the checklist for this entry, creating it on first presentation
+        checklist = get_or_create_checklist(entry)
+        debug_print(f"Checklist ID: {checklist.id}")
+
+        # Open it by GET so the page has a stable URL the service worker can cache for offline use
+        return redirect(url_for('checklists.view_checklist', checklist_id=checklist.id), code=303)
+
+    elif request.method == 'GET':
+        checklist_id = request.args.get('checklist_id')  # Get checklist_id from query parameters
+        checklist = db.session.get(InspectionChecklist, checklist_id)
+
+        if not checklist:
+            return jsonify({'error': "Checklist not found!"}), 404
+
+        # Fetch associated entry
+        entry = Entry.query.get(checklist.entry_id)
+        scrutineers = Officials.query.filter_by(role="Scrutineer").all()
+        items = InspectionItem.query.filter_by(checklist_id=checklist.id).all()
+       
+
+        return render_template(
+            'checklist.html',
+            checklist=checklist,
+            items=items,
+            entry=entry,
+            scrutineers=scrutineers,
+            current_date=datetime.now().strftime('%Y-%m-%d'),
+            current_time=datetime.now().strftime('%H:%M:%S')
+        )
+
+# Route: View Checklist2 (GET & POST)
+@bp.route('/view_checklist2', methods=['GET', 'POST'])
+@login_required
+def view_checklist2():
+    if request.method == 'POST':
+        # Handle POST request: Create or fetch checklist based on entry_id
+        entry_id = request.form.get('entry_id')  # Get entry_id from the form
+        debug_print(f"Received entry_id: {entry_id}")
+
+        entry = db.session.get(Entry, entry_id)  # Retrieve the entry
+        if not entry:
+            return jsonify({'error': "Entry not found!"}), 404
+
+        debug_print(f"Found entry: {entry}")
+
+        # Fetch the checklist for this entry, creating it on first presentation
+        checklist = get_or_create_checklist(entry)
+        debug_print(f"Checklist ID: {checklist.id}")
+
+        # Open it by GET so the page has a stable URL the service worker can cache for offline use
+        return redirect(url_for('checklists.view_checklist2', checklist_id=checklist.id), code=303)
+
+    elif request.method == 'GET':
+        # Handle GET request: Fetch checklist based on checklist_id
+        checklist_id = request.args.get('checklist_id')  # Get checklist_id from query parameters
+        checklist = InspectionChecklist.query.get(checklist_id)
+
+        if not checklist:
+            return jsonify({'error': "Checklist not found!"}), 404
+
+        # Fetch associated entry
+        entry = Entry.query.get(checklist.entry_id)
+        scrutineers = Officials.query.filter_by(role="Scrutineer").all()
+        items = InspectionItem.query.filter_by(checklist_id=checklist.id).all()
+
+        return render_template(
+            'checklist2.html',
+            checklist=checklist,
+            items=items,
+            entry=entry,
+            scrutineers=scrutineers,
+            current_date=datetime.now().strftime('%Y-%m-%d'),
+            current_time=datetime.now().strftime('%H:%M:%S')
+        )    
+
+# Answer a stale checklist save: 409 JSON for API clients, otherwise reload the checklist with a message
+def checklist_conflict_response(conflict, view):
+    if request.accept_mimetypes.best_match(['text/html', 'application/json']) == 'application/json':
+        return jsonify(conflict.to_dict()), 409
+
+    names = [item['item_name'] for item in conflict.items] + [field.replace('_', ' ') for field in conflict.fields]
+    editors = sorted({item['changed_by'] for item in conflict.items if item['changed_by']})
+    flash(f"This checklist was saved{' by ' + ', '.join(editors) if editors else ''} while you were editing it "
+          f"({', '.join(names) or 'no visible changes'}). Your changes were not saved, "
+          f"please check the latest values and save again.", "error")
+    return redirect(url_for(view, checklist_id=conflict.checklist_id))
+
+# route: update checklist 2
+@bp.route('/update_checklist2', methods=['POST'])
+@login_required
+def update_checklist2():
+    checklist_id = request.form.get('checklist_id')
+    try:
+        # Write only the fields that changed, in one transaction
+        save_checklist(checklist_id, request.form, changed_by=current_user.username)
+        flash("Checklist updated successfully!", "success")
+        return redirect(url_for('entries.lookup_entry2', checklist_id=checklist_id))
+
+    except ChecklistConflict as conflict:
+        db.session.rollback()
+        return checklist_conflict_response(conflict, 'checklists.view_checklist2')
+
+    except Exception as e:
+        db.session.rollback()
+        print(f"An error occurred: {e}")
+        flash("An error occurred while updating the checklist. Please try again.", "error")
+        return redirect(url_for('checklists.view_checklist2', checklist_id=checklist_id))
+
+# Update Checklist
+@bp.route('/update_checklist', methods=['POST'])
+@login_required
+def update_checklist():
+    checklist_id = request.form.get('checklist_id')
+    try:
+        # Write only the fields that changed, in one transaction
+        save_checklist(checklist_id, request.form, changed_by=current_user.username)
+        flash("Checklist updated successfully!", "success")
+        return redirect(url_for('entries.lookup_entry'))
+
+    except ChecklistConflict as conflict:
+        db.session.rollback()
+        return checklist_conflict_response(conflict, 'checklists.view_checklist')
+
+    except Exception as e:
+        db.session.rollback()
+        print(f"An error occurred: {e}")
+        flash("An error occurred while updating the checklist. Please try again.", "error")
+        return redirect(url_for('checklists.view_checklist', checklist_id=checklist_id))
+    
+
+# Route: Service worker for offline checklist capture, served from the root so it controls every page
+@bp.route('/sw.js')
+def service_worker():
+    response = send_from_directory(current_app.static_folder, 'sw.js')
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
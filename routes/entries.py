@@ -0,0 +1,139 @@
+# routes/entries.py
+# World Time Attack entries: home page, adding entries and the lookup pages
+from flask import Blueprint, current_app, render_template, request, redirect, url_for, flash
+from flask_login import login_required, current_user
+from models import db, Entry, EntryStatus, normalize_class
+from status import refresh_entry_status
+from search import search_entry_ids
+from checklists import create_checklist, class_names, entry_classes
+from weights import parse_power
+
+bp = Blueprint('entries', __name__)
+
+# Lookup page rows for a search query, best match first
+def lookup_results(search_query):
+    entry_ids = search_entry_ids(search_query)
+    if not entry_ids:
+        return []
+    results = db.session.query(
+        Entry.id,
+        Entry.driver_name,
+        Entry.vehicle_number,
+        Entry.vehicle_make,
+        Entry.vehicle_model,
+        Entry.class_type,
+        Entry.garage_number,
+        EntryStatus.checklist_id  # Presented entries open their checklist by GET
+    ).outerjoin(EntryStatus, Entry.id == EntryStatus.entry_id) \
+     .filter(Entry.id.in_(entry_ids)).all()
+    rank = {entry_id: position for position, entry_id in enumerate(entry_ids)}
+    return sorted(results, key=lambda row: rank[row.id])
+
+# Route: Home 
+@bp.route('/')
+@login_required
+def index():
+    user_role = current_user.role  # Get the role of the logged-in user
+    return render_template('index.html', user=current_user, role=user_role, classes=class_names())  # Render the home page
+
+# Route: Add Entry (GET)
+@bp.route('/add_entry', methods=['GET'])
+@login_required
+def show_add_entry():
+    return render_template('add_entry.html', classes=class_names())  # Pass classes to the template
+
+# Route: Add Entry (POST)
+@bp.route('/add_entry', methods=['POST'])
+@login_required
+def add_entry():
+    # Extract data from the form
+    vehicle_number = request.form.get('vehicle_number')
+    vehicle_make = request.form.get('vehicle_make')
+    vehicle_model = request.form.get('vehicle_model')
+    garage_number = request.form.get('garage_number')
+    log_book_number = request.form.get('log_book_number')
+    licence_number = request.form.get('licence_number', '000000')
+    driver_name = request.form.get('driver_name')
+    power_kw = request.form.get('power_kw')
+    class_type = request.form.get('class')
+    action = request.form.get('action')  # Capture the action (add or add_and_inspect)
+
+    # Check mandatory fields
+    if not vehicle_number or not vehicle_make or not driver_name or not class_type:
+        return render_template('add_entry.html', error="Please fill in all required fields.", classes=class_names())
+    normalized_class_type = normalize_class(class_type)
+    if normalized_class_type not in {code for code, name in entry_classes()}:
+        return render_template('add_entry.html', error=f"Unknown class {class_type!r}.", classes=class_names())
+    if power_kw and parse_power(power_kw) is None:
+        return render_template('add_entry.html', error="Power must be a number of kW.", classes=class_names())
+
+    # Create a new Entry object
+    new_entry = Entry(
+        vehicle_number=vehicle_number,
+        vehicle_make=vehicle_make,
+        vehicle_model=vehicle_model,
+        garage_number=garage_number,
+        log_book_number=log_book_number,
+        licence_number=licence_number,
+        driver_name=driver_name,
+        power_kw=parse_power(power_kw),
+        class_type=normalized_class_type
+    )
+
+    try:
+        # Add the entry to the database, flushed for its ID
+        db.session.add(new_entry)
+        db.session.flush()
+
+        # Handle the "Add Entry and Inspect" action
+        if action == "add_and_inspect":
+            # Generate a checklist and its inspection items for the new entry, committed together
+            # with the entry so a failure never leaves an entry without its checklist
+            checklist = create_checklist(new_entry)
+            db.session.commit()
+
+            # Redirect to the checklist page
+            return redirect(url_for('checklists.view_checklist', checklist_id=checklist.id))
+
+        refresh_entry_status([new_entry.id])
+        db.session.commit()
+
+        # Handle the "Add Entry" action
+        flash("Entry added successfully!", "success")
+        return redirect(url_for('entries.index'))
+
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.exception("Error adding entry: %s", e)
+        return render_template('add_entry.html', error="Failed to add entry. Please try again.", classes=class_names())
+    
+# Route: Lookup Entry (GET)
+@bp.route('/lookup_entry', methods=['GET'])
+@login_required
+def lookup_entry():
+    search_query = request.args.get('search_query', '').strip()
+
+    if search_query:
+        # Fetch entries matching the search query from the search index
+        results = lookup_results(search_query)
+    else:
+        results = []
+
+    # Render the template and pass the results
+    return render_template('lookup_entry.html', results=results, search_query=search_query)
+
+# Route: Lookup Entry2 (GET)
+@bp.route('/lookup_entry2', methods=['GET'])
+@login_required
+# This route is similar to lookup_entry but its for loaded the button stye view page
+def lookup_entry2():
+    search_query = request.args.get('search_query', '').strip()
+
+    if search_query:
+        # Fetch entries matching the search query from the search index
+        results = lookup_results(search_query)
+    else:
+        results = []
+
+    # Render the template and pass the results
+    return render_template('lookup_entry2.html', results=results, search_query=search_query)
@@ -0,0 +1,31 @@
+# routes/formula_ford.py
+# Formula Ford section, planned
+from flask import Blueprint
+
+bp = Blueprint('formula_ford', __name__, url_prefix='/formula_ford')
+
+# Route: Formula Ford Home
+
+# Route: Formula Ford Compeditors
+
+# Route: Formula Ford Engines
+
+# Route: Formula Ford ECU
+
+# Route: Formula Ford Tyres
+
+# Route: Formula Ford Weights
+
+# Route: Formula Ford Height
+
+# Route: Formula Ford Dash Data
+
+# Route: Formula Ford Eligibility Test
+
+# Route: Formula Ford View Checks
+
+# Route: Formula Ford Import via CSV
+
+# Route: Formula Ford Weekend Report
+
+# Route: Formula Ford Issue Tracking
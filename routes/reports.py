@@ -0,0 +1,165 @@
+# routes/reports.py
+# Printable report pages, read from the entry_status summary
+from flask import Blueprint, current_app, jsonify, render_template, request
+from flask_login import login_required
+from models import db, Entry, EntryStatus, InspectionChecklist
+from routes import debug_print, entry_order_by
+from sqlalchemy import case
+from cache import cached_report, data_version
+
+bp = Blueprint('reports', __name__)
+
+# Report pages that refresh themselves, and which entries each one lists
+LIVE_REPORTS = {
+    'outstanding_items': EntryStatus.outstanding_items != None,
+    'denied_start': EntryStatus.approval_status == "Fail",
+    'not_approved': EntryStatus.approval_status.in_(["Pending", "NA"]),
+}
+
+# Columns of a live report row, as rendered by the pages and sent to app.js
+REPORT_ROW_COLUMNS = (
+    Entry.id.label('entry_id'),
+    Entry.vehicle_number,
+    Entry.driver_name,
+    Entry.class_type,
+    Entry.garage_number,
+    Entry.vehicle_sort_key,
+    Entry.garage_sort_key,
+    EntryStatus.checklist_id,
+    EntryStatus.outstanding_items.label('failed_items')
+)
+
+# Rows of a live report page
+def report_rows(report, order_by):
+    return db.session.query(*REPORT_ROW_COLUMNS) \
+        .join(EntryStatus, Entry.id == EntryStatus.entry_id) \
+        .filter(LIVE_REPORTS[report]) \
+        .order_by(*entry_order_by(order_by)).all()
+
+# Route: Vehicle Weights
+@bp.route('/vehicle_weights')
+@login_required
+@cached_report
+def vehicle_weights():
+    # Fetch vehicle weights from the database, heaviest first and vehicles not yet weighed last
+    vehicles = db.session.query(
+        Entry.vehicle_number,
+        Entry.driver_name,
+        Entry.class_type,
+        EntryStatus.vehicle_weight,
+        EntryStatus.weight_kg
+    ).join(EntryStatus, Entry.id == EntryStatus.entry_id) \
+     .filter(EntryStatus.checklist_id != None) \
+     .order_by(EntryStatus.weight_kg == None, EntryStatus.weight_kg.desc(), *entry_order_by()).all()
+    debug_print("Vehicles weighed:", sum(vehicle.weight_kg is not None for vehicle in vehicles))
+    # Render the template and pass the vehicle data
+    return render_template('vehicle_weights.html', vehicles=vehicles,
+                           minimums=current_app.config['CLASS_MINIMUM_WEIGHTS'])
+
+# Route: Outstanding Items
+@bp.route('/outstanding_items')
+@cached_report
+def outstanding_items():
+    # Get the sorting preference from the query parameter (default is 'vehicle_number')
+    order_by = request.args.get('order_by', 'vehicle_number')
+
+    # Fetch vehicles with unresolved inspection items
+    items = report_rows('outstanding_items', order_by)
+
+    # Render the template and pass the data
+    return render_template('outstanding_items.html', items=items, order_by=order_by, version=data_version())
+
+# Route: Garage Numbers
+@bp.route('/garage_numbers')
+@login_required
+@cached_report
+def garage_numbers():
+    # Get the sorting preference from the query parameter (default is 'vehicle_number')
+    order_by = request.args.get('order_by', 'vehicle_number')
+
+    # Fetch vehicle details and garage numbers from the database
+    vehicles = db.session.query(
+        Entry.vehicle_number,
+        Entry.driver_name,
+        Entry.class_type,
+        Entry.garage_number
+    ).order_by(*entry_order_by(order_by)).all()
+
+    # Render the template and pass the vehicle data
+    return render_template('garage_numbers.html', vehicles=vehicles, order_by=order_by)
+
+# Route: Denied Start
+@bp.route('/denied_start')
+@login_required
+@cached_report
+def denied_start():
+    # Get the sorting preference from the query parameter (default is 'vehicle_number')
+    order_by = request.args.get('order_by', 'vehicle_number')
+
+    # Fetch vehicles where "Approved to Start" is "Fail"
+    items = report_rows('denied_start', order_by)
+
+    # Render the template and pass the data
+    return render_template('denied_start.html', items=items, order_by=order_by, version=data_version())
+
+# Route: Not Approved to start
+@bp.route('/not_approved')
+@login_required
+@cached_report
+def not_approved():
+    # Get the sorting preference from the query parameter (default is 'vehicle_number')
+    order_by = request.args.get('order_by', 'vehicle_number')
+
+    # Fetch vehicles where "Approved to Start" is "Pending" or "N/A"
+    items = report_rows('not_approved', order_by)
+
+    # Render the template and pass the data
+    return render_template('not_approved.html', items=items, order_by=order_by, version=data_version())
+
+# Route: Not Presented
+@bp.route('/not_presented')
+@login_required
+@cached_report
+def not_presented():
+    # Get the sorting preference from the query parameter (default is 'vehicle_number')
+    order_by = request.args.get('order_by', 'vehicle_number')
+
+    # Fetch vehicles without an associated checklist
+    vehicles = db.session.query(
+        Entry.id,
+        Entry.vehicle_number,
+        Entry.driver_name,
+        Entry.class_type,
+        Entry.garage_number
+    ).outerjoin(InspectionChecklist, Entry.id == InspectionChecklist.entry_id) \
+     .filter(InspectionChecklist.id == None) \
+     .order_by(*entry_order_by(order_by)).all()
+
+    # Render the template and pass the vehicle data
+    return render_template('not_presented.html', vehicles=vehicles, order_by=order_by)
+
+# Endpoint: Summary rows changed since a data version (JSON), polled by the live report pages.
+# Each row lists the reports it belongs on, so app.js can update, insert or remove it in place.
+# Every page at the same version shares one cached body, and gets a 304 until the next write.
+@bp.route('/api/reports/changes', methods=['GET'])
+@login_required
+@cached_report
+def report_changes():
+    since = request.args.get('since', type=int)
+    if since is None:
+        return jsonify({'error': "since must be a data version."}), 400
+
+    rows = db.session.query(
+        *REPORT_ROW_COLUMNS,
+        *(case((listed, True), else_=False).label(name) for name, listed in LIVE_REPORTS.items())
+    ).join(EntryStatus, Entry.id == EntryStatus.entry_id) \
+     .filter(EntryStatus.data_version > since).all()
+
+    return jsonify({
+        'version': data_version(),
+        'rows': [
+            dict({column: getattr(row, column) for column in row._fields if column not in LIVE_REPORTS},
+                 reports=[name for name in LIVE_REPORTS if getattr(row, name)])
+            for row in rows
+        ]
+    })
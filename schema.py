@@ -0,0 +1,28 @@
+from sqlalchemy import func
+from models import db, InspectionChecklist
+from migrations import migrate
+
+
+def ensure_unique_checklists():
+    """
+    Add the one-checklist-per-entry unique index once 'flask dedupe-checklists' has removed the
+    duplicates that kept migration 10 from adding it. Returns whether the index is in place.
+    """
+    duplicates = db.session.query(InspectionChecklist.entry_id) \
+        .group_by(InspectionChecklist.entry_id) \
+        .having(func.count(InspectionChecklist.id) > 1).all()
+    if duplicates:
+        print(f"Warning: entries {[row[0] for row in duplicates]} still have more than one checklist.")
+        return False
+    for index in InspectionChecklist.__table__.indexes:
+        index.create(db.engine, checkfirst=True)
+    return True
+
+
+def upgrade_schema():
+    """
+    Bring the database up to date with the models: new tables are created, then the numbered
+    migrations in migrations.py are applied. Safe to run on every start, also on an empty database.
+    """
+    for version, description in migrate(db.engine):
+        print(f"Applied migration {version}: {description}")
@@ -0,0 +1,122 @@
+import difflib
+import re
+from sqlalchemy import Float, Integer, and_, false, func, or_, text
+from models import db, Entry
+
+# Columns searched by the lookup pages, in the order they appear in the FTS table
+SEARCH_COLUMNS = ['driver_name', 'vehicle_number', 'vehicle_make', 'vehicle_model']
+
+# bm25 weights per column, a vehicle number hit ranks above a name/make/model hit
+SEARCH_WEIGHTS = [2.0, 10.0, 1.0, 1.0]
+
+# The entries_fts index itself is created by migration 12, see migrations.py
+
+
+def search_index_available():
+    """
+    Full-text search is only available on SQLite, other backends fall back to ILIKE.
+    """
+    return db.engine.dialect.name == 'sqlite'
+
+
+def rebuild_search_index():
+    """
+    Recreate the entries_fts contents from the entries table.
+    """
+    if search_index_available():
+        db.session.execute(text("INSERT INTO entries_fts(entries_fts) VALUES ('rebuild')"))
+        db.session.commit()
+
+
+def search_terms(search_query):
+    """
+    Split a search box query into lower-case word tokens.
+    """
+    return re.findall(r'\w+', search_query.lower())
+
+
+def _fts_ids(match_expression):
+    # Entry IDs matching an FTS5 expression, usable as an IN (...) subquery
+    return text("SELECT rowid FROM entries_fts WHERE entries_fts MATCH :match") \
+        .bindparams(match=match_expression).columns(rowid=Integer)
+
+
+def _fuzzy_alternatives(term):
+    # Closest indexed words to a (possibly misspelt) search term
+    vocabulary = [row[0] for row in db.session.execute(text("SELECT term FROM entries_fts_vocab")).all()]
+    return difflib.get_close_matches(term, vocabulary, n=5, cutoff=0.7)
+
+
+def match_expression(search_query):
+    """
+    Build the FTS5 expression for a search box query, or None when nothing can match.
+    Every word must prefix-match one of the searched columns; when nothing matches, each word
+    is swapped for its closest indexed words so small typos still find the car.
+    """
+    terms = search_terms(search_query)
+    if not terms:
+        return None
+
+    expression = ' AND '.join(f'"{term}"*' for term in terms)
+    if db.session.execute(_fts_ids(expression)).first():
+        return expression
+
+    # Fuzzy fallback
+    groups = []
+    for term in terms:
+        alternatives = _fuzzy_alternatives(term)
+        if not alternatives:
+            return None
+        groups.append('(' + ' OR '.join(f'"{alternative}"' for alternative in alternatives) + ')')
+    return ' AND '.join(groups)
+
+
+def search_filter(search_query):
+    """
+    SQL criterion selecting the entries that match a search box query, for paged listings.
+    """
+    if not search_index_available():
+        terms = search_terms(search_query)
+        if not terms:
+            return false()
+        # Fall back to substring matching on backends without the FTS index
+        return and_(*[
+            or_(*[getattr(Entry, column).ilike(f"%{term}%") for column in SEARCH_COLUMNS])
+            for term in terms
+        ])
+
+    expression = match_expression(search_query)
+    if expression is None:
+        return false()
+    return Entry.id.in_(_fts_ids(expression))
+
+
+def ranked_matches(search_query):
+    """
+    Subquery of the entries matching a search box query as (entry_id, rank) rows, or None when
+    nothing can match. Ordering by rank then entry_id gives the best match first: the bm25 score
+    on SQLite, the vehicle number on backends without the FTS index. The lookup pages and the
+    search API both use this order.
+    """
+    if not search_index_available():
+        return db.session.query(Entry.id.label('entry_id'), func.coalesce(Entry.vehicle_sort_key, '').label('rank')) \
+            .filter(search_filter(search_query)).subquery('ranked')
+
+    expression = match_expression(search_query)
+    if expression is None:
+        return None
+    return text(
+        f"SELECT rowid AS entry_id, bm25(entries_fts, {', '.join(str(weight) for weight in SEARCH_WEIGHTS)}) AS rank "
+        f"FROM entries_fts WHERE entries_fts MATCH :match"
+    ).bindparams(match=expression).columns(entry_id=Integer, rank=Float).subquery('ranked')
+
+
+def search_entry_ids(search_query, limit=200):
+    """
+    Return the IDs of entries matching the query, best match first.
+    """
+    ranked = ranked_matches(search_query)
+    if ranked is None:
+        return []
+    rows = db.session.query(ranked.c.entry_id).order_by(ranked.c.rank, ranked.c.entry_id).limit(limit).all()
+    return [row[0] for row in rows]
@@ -1,66 +1,25 @@
-// Fetch and display dashboard data
+// Fetch and display dashboard data, every counter in a single request, kept current by pollLive
 document.addEventListener("DOMContentLoaded", () => {
-    fetchTotalEntries();
-    fetchClassEntries();
-    fetchMissingInspections();
-    fetchNotApproved();
-    fetchFailedItems();
+    if (document.getElementById('dashboard')) {
+      pollLive(() => '/dashboard_stats', showDashboardStats);
+    }
   });
-  
-  // Fetch total entries with vehicle_type W
-  function fetchTotalEntries() {
-    fetch('/total_entries')
-      .then(response => response.json())
-      .then(data => {
-        document.getElementById('totalEntries').innerText = data.total_entries;
-      })
-      .catch(err => console.error('Error fetching total entries:', err));
-  }
-  
-  // Fetch entries per class
-  function fetchClassEntries() {
-    fetch('/class_entries')
-      .then(response => response.json())
-      .then(data => {
-        const list = document.getElementById('classEntries');
-        list.innerHTML = ''; // Clear existing list
-        data.class_entries.forEach(entry => {
-          const li = document.createElement('li');
-          li.innerText = `${Object.keys(entry)[0]}: ${Object.values(entry)[0]} entries`;
-          list.appendChild(li);
-        });
-      })
-      .catch(err => console.error('Error fetching class entries:', err));
-  }
-  
-  // Fetch total entries without inspection reports
-  function fetchMissingInspections() {
-    fetch('/missing_inspections')
-      .then(response => response.json())
-      .then(data => {
-        document.getElementById('missingReports').innerText = data.missing_inspections.length;
-      })
-      .catch(err => console.error('Error fetching missing inspections:', err));
-  }
-  
-  // Fetch total entries not approved to start
-  function fetchNotApproved() {
-    fetch('/not_approved_to_start')
-      .then(response => response.json())
-      .then(data => {
-        document.getElementById('notApproved').innerText = data.not_approved_to_start_count;
-      })
-      .catch(err => console.error('Error fetching not approved entries:', err));
-  }
-  
-  // Fetch total failed items
-  function fetchFailedItems() {
-    fetch('/failed_items')
-      .then(response => response.json())
-      .then(data => {
-        document.getElementById('failedItems').innerText = data.failed_items_count;
-      })
-      .catch(err => console.error('Error fetching failed items:', err));
+
+  function showDashboardStats(data) {
+    document.getElementById('totalEntries').innerText = data.total_entries;
+
+    const list = document.getElementById('classEntries');
+    list.innerHTML = ''; // Clear existing list
+    data.class_entries.forEach(entry => {
+      const li = document.createElement('li');
+      li.innerText = `${Object.keys(entry)[0]}: ${Object.values(entry)[0]} entries`;
+      list.appendChild(li);
+    });
+
+    document.getElementById('missingReports').innerText = data.missing_inspections_count;
+    document.getElementById('notApproved').innerText = data.not_approved_to_start_count;
+    document.getElementById('failedItems').innerText = data.failed_items_count;
+    document.getElementById('deniedStart').innerText = data.denied_start_count;
   }
   
   // Action Functions (Add more detail as you implement)
@@ -124,20 +83,6 @@ function updateLicenceNumber() {
     }
   }
 }
-// Fetch total vehicles denied start
-function fetchDeniedStart() {
-  fetch('/denied_start_count')
-    .then(response => response.json())
-    .then(data => {
-      document.getElementById('deniedStart').innerText = data.denied_start_count;
-    })
-    .catch(err => console.error('Error fetching denied start count:', err));
-}
-
-// Call the function when the page loads
-document.addEventListener('DOMContentLoaded', () => {
-  fetchDeniedStart();
-});
 document.addEventListener('DOMContentLoaded', () => {
   // Add event listeners to all status buttons
   const statusButtons = document.querySelectorAll('.status-button');
@@ -160,4 +105,405 @@ document.addEventListener('DOMContentLoaded', () => {
       button.classList.add('selected');
     });
   });
-});
\ No newline at end of file
+});
+// As-you-type search on the lookup pages using the JSON search API
+document.addEventListener('DOMContentLoaded', () => {
+  const searchInput = document.getElementById('search_query');
+  const resultsContainer = document.getElementById('search-results');
+  if (!searchInput || !resultsContainer) {
+    return;
+  }
+
+  let debounceTimer = null;
+  let latestQuery = '';
+
+  searchInput.addEventListener('input', () => {
+    clearTimeout(debounceTimer);
+    debounceTimer = setTimeout(() => {
+      latestQuery = searchInput.value.trim();
+      if (latestQuery) {
+        fetchSearchPage(latestQuery, null, true);
+      }
+    }, 200);
+  });
+
+  // Fetch one page of results, replacing the table or appending to it
+  function fetchSearchPage(query, cursor, replace) {
+    const params = new URLSearchParams({ q: query, limit: 25 });
+    if (cursor) {
+      params.set('cursor', cursor);
+    }
+    fetch(`/api/entries/search?${params}`)
+      .then(response => response.json())
+      .then(data => {
+        if (query !== latestQuery) {
+          return; // A newer search has been typed since
+        }
+        renderSearchResults(query, data, replace);
+      })
+      .catch(err => console.error('Error searching entries:', err));
+  }
+
+  function renderSearchResults(query, data, replace) {
+    let tbody = resultsContainer.querySelector('tbody');
+    if (replace || !tbody) {
+      resultsContainer.innerHTML = '';
+      if (data.results.length === 0) {
+        const message = document.createElement('p');
+        message.textContent = `No results found for "${query}".`;
+        resultsContainer.appendChild(message);
+        return;
+      }
+      const heading = document.createElement('h2');
+      heading.textContent = 'Search Results';
+      const table = document.createElement('table');
+      table.border = '1';
+      const headerRow = table.createTHead().insertRow();
+      ['Driver Name', 'Vehicle Number', 'Make', 'Model', 'Class', 'Garage Number', 'Action'].forEach(title => {
+        const th = document.createElement('th');
+        th.textContent = title;
+        headerRow.appendChild(th);
+      });
+      tbody = table.createTBody();
+      resultsContainer.append(heading, table);
+    }
+
+    data.results.forEach(entry => {
+      const row = tbody.insertRow();
+      [entry.driver_name, entry.vehicle_number, entry.vehicle_make, entry.vehicle_model,
+       entry.class_type, entry.garage_number || 'Not Assigned'].forEach(value => {
+        row.insertCell().textContent = value;
+      });
+      row.insertCell().appendChild(buildSelectForm(entry));
+    });
+
+    // "Load more" pages through the results with the keyset cursor
+    const oldButton = resultsContainer.querySelector('.load-more');
+    if (oldButton) {
+      oldButton.remove();
+    }
+    if (data.next_cursor) {
+      const button = document.createElement('button');
+      button.type = 'button';
+      button.className = 'load-more';
+      button.textContent = 'Load more';
+      button.addEventListener('click', () => fetchSearchPage(query, data.next_cursor, false));
+      resultsContainer.appendChild(button);
+    }
+  }
+
+  // Presented entries open their checklist by GET (cached for offline use), the rest are presented by POST
+  function buildSelectForm(entry) {
+    const form = document.createElement('form');
+    form.action = resultsContainer.dataset.checklistAction;
+    form.method = entry.checklist_id ? 'GET' : 'POST';
+    form.style.display = 'inline';
+    const input = document.createElement('input');
+    input.type = 'hidden';
+    input.name = entry.checklist_id ? 'checklist_id' : 'entry_id';
+    input.value = entry.checklist_id || entry.id;
+    const button = document.createElement('button');
+    button.type = 'submit';
+    button.textContent = 'Select';
+    form.append(input, button);
+    return form;
+  }
+});
+
+// Offline-first checklist saves: edited fields are queued on the tablet (IndexedDB) and
+// sent to /api/checklists/sync in bulk, so a dropped connection never loses the work
+const SYNC_DB_NAME = 'racing-offline';
+const SYNC_STORE = 'pendingEdits';
+const ITEM_FIELD_PATTERN = /^(status|brand|standard|expiry_date|rops|vehicle_weight)_(\d+)$/;
+const CHECKLIST_FIELD_NAMES = ['scrutineer_name', 'scrutineer_licence_number', 'date', 'time'];
+
+function openSyncQueue() {
+  return new Promise((resolve, reject) => {
+    const request = indexedDB.open(SYNC_DB_NAME, 1);
+    request.onupgradeneeded = () => request.result.createObjectStore(SYNC_STORE, { keyPath: 'edit_id' });
+    request.onsuccess = () => resolve(request.result);
+    request.onerror = () => reject(request.error);
+  });
+}
+
+// Run fn(store) in a transaction and resolve with its request result once committed
+function withSyncStore(mode, fn) {
+  return openSyncQueue().then(database => new Promise((resolve, reject) => {
+    const transaction = database.transaction(SYNC_STORE, mode);
+    const request = fn(transaction.objectStore(SYNC_STORE));
+    transaction.oncomplete = () => resolve(request ? request.result : undefined);
+    transaction.onerror = () => reject(transaction.error);
+  }));
+}
+
+function queueEdits(edits) {
+  return withSyncStore('readwrite', store => {
+    edits.forEach(edit => store.put(edit));
+  });
+}
+
+function pendingEdits() {
+  return withSyncStore('readonly', store => store.getAll());
+}
+
+function removeEdits(editIds) {
+  return withSyncStore('readwrite', store => {
+    editIds.forEach(editId => store.delete(editId));
+  });
+}
+
+function newEditId() {
+  if (window.crypto && crypto.randomUUID) {
+    return crypto.randomUUID();
+  }
+  return `${Date.now()}-${Math.random().toString(16).slice(2)}`;
+}
+
+// Send every queued edit; rejects when the server can't be reached so the edits stay queued
+function flushPendingEdits(flash) {
+  return pendingEdits().then(edits => {
+    if (edits.length === 0) {
+      return null;
+    }
+    return fetch('/api/checklists/sync', {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ edits: edits, flash: Boolean(flash) })
+    })
+      .then(response => {
+        if (!response.ok) {
+          throw new Error(`Sync failed with status ${response.status}`);
+        }
+        return response.json();
+      })
+      .then(result => {
+        // Conflicts and invalid edits can't succeed on retry, so they leave the queue too
+        const done = result.applied.concat(result.duplicates,
+          result.conflicts.map(conflict => conflict.edit_id),
+          result.errors.map(error => error.edit_id));
+        return removeEdits(done).then(() => result);
+      });
+  });
+}
+
+// Build sync edits from the fields changed since the page was rendered
+function collectChecklistEdits(form, itemFields) {
+  const checklistId = Number(form.elements['checklist_id'].value);
+  const itemEdits = {};
+  itemFields.forEach(field => {
+    if (field.value === field.dataset.originalValue) {
+      return;
+    }
+    const [, name, itemId] = field.name.match(ITEM_FIELD_PATTERN);
+    if (!itemEdits[itemId]) {
+      const row = field.closest('[data-item-version]');
+      itemEdits[itemId] = {
+        edit_id: newEditId(),
+        checklist_id: checklistId,
+        item_id: Number(itemId),
+        base_version: row ? Number(row.dataset.itemVersion) : null,
+        fields: {}
+      };
+    }
+    itemEdits[itemId].fields[name === 'vehicle_weight' ? 'value' : name] = field.value;
+  });
+
+  // One edit per changed checklist-level field, based on the checklist version the page showed,
+  // so a field another scrutineer saved in the meantime comes back as a conflict on its own
+  const edits = Object.values(itemEdits);
+  const baseVersion = Number(form.elements['version'].value);
+  checklistFields(form).forEach(field => {
+    if (field.value && field.value !== field.dataset.originalValue) {
+      edits.push({
+        edit_id: newEditId(),
+        checklist_id: checklistId,
+        item_id: null,
+        base_version: baseVersion,
+        fields: { [field.name]: field.value }
+      });
+    }
+  });
+  return edits;
+}
+
+function checklistFields(form) {
+  return CHECKLIST_FIELD_NAMES.map(name => form.elements[name]).filter(Boolean);
+}
+
+function showChecklistMessage(form, category, message) {
+  let box = form.querySelector('.sync-message');
+  if (!box) {
+    box = document.createElement('div');
+    box.className = 'sync-message';
+    form.prepend(box);
+  }
+  box.className = `sync-message alert ${category}`;
+  box.textContent = message;
+}
+
+document.addEventListener('DOMContentLoaded', () => {
+  document.querySelectorAll('form.checklist-form').forEach(form => {
+    const itemFields = Array.from(form.elements).filter(field => ITEM_FIELD_PATTERN.test(field.name));
+
+    // Remember the values the page was rendered with
+    itemFields.concat(checklistFields(form)).forEach(field => {
+      field.dataset.originalValue = field.value;
+    });
+
+    form.addEventListener('submit', event => {
+      if (!window.indexedDB) {
+        // No local queue available: post the form, sending only the edited item fields
+        itemFields.forEach(field => {
+          if (field.value === field.dataset.originalValue) {
+            field.disabled = true; // Disabled fields are not submitted
+          }
+        });
+        const marker = document.createElement('input');
+        marker.type = 'hidden';
+        marker.name = 'omitted';
+        marker.value = 'unchanged';
+        form.appendChild(marker);
+        return;
+      }
+
+      event.preventDefault();
+      queueEdits(collectChecklistEdits(form, itemFields))
+        .then(() => flushPendingEdits(true))
+        .then(result => {
+          if (result && result.conflicts.length) {
+            const names = result.conflicts.map(conflict => {
+              const now = conflict.item_id === null ? Object.values(conflict.server || {}).join(', ')
+                : conflict.server && (conflict.server.status || conflict.server.value);
+              return `${conflict.item_name} (now ${now})`;
+            });
+            showChecklistMessage(form, 'error',
+              `Another scrutineer changed these items first, reload the checklist to review them: ${names.join(', ')}`);
+            return;
+          }
+          window.location.href = form.dataset.successUrl;
+        })
+        .catch(err => {
+          console.error('Checklist sync failed, edits kept on this tablet:', err);
+          showChecklistMessage(form, 'warning',
+            'Saved on this tablet. The changes will be sent automatically when the connection is back.');
+        });
+    });
+  });
+
+  // Send anything left over from earlier offline saves
+  if (window.indexedDB) {
+    flushPendingEdits(false).catch(err => console.error('Checklist sync failed:', err));
+  }
+});
+
+window.addEventListener('online', () => {
+  if (window.indexedDB) {
+    flushPendingEdits(false).catch(err => console.error('Checklist sync failed:', err));
+  }
+});
+
+// Cache pages and assets so checklists already opened on this tablet still load offline
+if ('serviceWorker' in navigator) {
+  window.addEventListener('load', () => {
+    navigator.serviceWorker.register('/sw.js')
+      .catch(err => console.error('Service worker registration failed:', err));
+  });
+}
+
+// Live updates: the dashboard and report pages poll every few seconds with the ETag of their last
+// response. The ETag is the shared data version, so any worker answers 304 until a write lands
+// anywhere. Report pages then fetch only the rows changed since their version and patch them in.
+const LIVE_POLL_MS = 5000;
+
+function buildReportRow(report, row) {
+  const tr = document.createElement('tr');
+  tr.dataset.entryId = row.entry_id;
+  [row.vehicle_number, row.driver_name, row.class_type, row.garage_number || 'Not Assigned'].forEach(text => {
+    const td = document.createElement('td');
+    td.textContent = text;
+    tr.appendChild(td);
+  });
+
+  if (report === 'outstanding_items') {
+    const td = document.createElement('td');
+    const select = document.createElement('select');
+    select.setAttribute('readonly', '');
+    (row.failed_items || '').split(',').forEach(name => {
+      const option = document.createElement('option');
+      option.textContent = name;
+      select.appendChild(option);
+    });
+    td.appendChild(select);
+    tr.appendChild(td);
+  }
+
+  const action = document.createElement('td');
+  const form = document.createElement('form');
+  form.action = '/view_checklist';
+  form.method = 'GET';
+  form.style.display = 'inline';
+  const checklistId = document.createElement('input');
+  checklistId.type = 'hidden';
+  checklistId.name = 'checklist_id';
+  checklistId.value = row.checklist_id;
+  const button = document.createElement('button');
+  button.type = 'submit';
+  button.textContent = 'View Checklist';
+  form.append(checklistId, button);
+  action.appendChild(form);
+  tr.appendChild(action);
+  return tr;
+}
+
+function updateReportRow(tbody, row) {
+  const existing = tbody.querySelector(`tr[data-entry-id="${row.entry_id}"]`);
+  if (existing) {
+    existing.remove();
+  }
+  const report = tbody.dataset.liveReport;
+  if (!row.reports.includes(report)) {
+    return;
+  }
+
+  // Insert in the page's sort order
+  const tr = buildReportRow(report, row);
+  tr.dataset.sortKey = (tbody.dataset.orderBy === 'garage_number' ? row.garage_sort_key : row.vehicle_sort_key) || '';
+  const next = Array.from(tbody.rows).find(other => other.dataset.sortKey > tr.dataset.sortKey);
+  tbody.insertBefore(tr, next || null);
+}
+
+// Fetch url() whenever the data changes and hand the JSON to render; a 304 costs no rendering
+function pollLive(url, render) {
+  let etag = null;
+  const poll = () => {
+    if (document.hidden) {
+      return; // Background tabs don't poll, they catch up when shown again
+    }
+    fetch(url(), { cache: 'no-store', headers: etag ? { 'If-None-Match': etag } : {} })
+      .then(response => {
+        if (response.status === 304) {
+          return;
+        }
+        if (!response.ok) {
+          throw new Error(`HTTP ${response.status}`);
+        }
+        etag = response.headers.get('ETag');
+        return response.json().then(render);
+      })
+      .catch(err => console.error('Live update failed:', err));
+  };
+  poll();
+  setInterval(poll, LIVE_POLL_MS);
+  document.addEventListener('visibilitychange', poll);
+}
+
+document.addEventListener('DOMContentLoaded', () => {
+  const report = document.querySelector('tbody[data-live-report]');
+  if (report) {
+    // Rows changed since the version the page (or the last update) showed
+    pollLive(() => `/api/reports/changes?since=${report.dataset.version}`, changes => {
+      changes.rows.forEach(row => updateReportRow(report, row));
+      report.dataset.version = changes.version;
+    });
+  }
+});
@@ -0,0 +1,54 @@
+// Service worker: keeps the app usable in garages with patchy Wi-Fi.
+// Pages are fetched network-first and fall back to the last cached copy; static assets are
+// served from the cache and refreshed in the background. Checklists open by GET
+// (/view_checklist?checklist_id=N, presenting a vehicle POSTs and is redirected there), so every
+// checklist opened on this tablet is cached under its own URL. Checklist saves are queued by app.js, not here.
+const CACHE_NAME = 'racing-v2';
+const PRECACHE = ['/static/styles.css', '/static/app.js'];
+
+self.addEventListener('install', event => {
+  event.waitUntil(caches.open(CACHE_NAME).then(cache => cache.addAll(PRECACHE)));
+  self.skipWaiting();
+});
+
+self.addEventListener('activate', event => {
+  event.waitUntil(
+    caches.keys()
+      .then(names => Promise.all(names.filter(name => name !== CACHE_NAME).map(name => caches.delete(name))))
+      .then(() => self.clients.claim())
+  );
+});
+
+self.addEventListener('fetch', event => {
+  const request = event.request;
+  const url = new URL(request.url);
+  if (request.method !== 'GET' || url.origin !== self.location.origin || url.pathname.startsWith('/api/')) {
+    return; // Let the browser handle writes, API calls and other origins
+  }
+
+  if (url.pathname.startsWith('/static/')) {
+    // Serve the cached copy straight away and refresh it in the background
+    event.respondWith(
+      caches.open(CACHE_NAME).then(cache => cache.match(request).then(cached => {
+        const network = fetch(request).then(response => {
+          cache.put(request, response.clone());
+          return response;
+        });
+        return cached || network;
+      }))
+    );
+    return;
+  }
+
+  event.respondWith(
+    fetch(request)
+      .then(response => {
+        if (response.ok) {
+          const copy = response.clone();
+          caches.open(CACHE_NAME).then(cache => cache.put(request, copy));
+        }
+        return response;
+      })
+      .catch(() => caches.match(request))
+  );
+});
@@ -0,0 +1,115 @@
+from sqlalchemy import case, func
+from models import db, Entry, EntryStatus, InspectionChecklist, InspectionItem, ItemKind, RESULT_KINDS
+from cache import stamp_with_version
+from weights import parse_weight
+
+
+def _concat(expression, dialect):
+    # Comma separated aggregate, spelt differently on PostgreSQL
+    if dialect.name == 'postgresql':
+        return func.string_agg(expression, ',')
+    return func.group_concat(expression)
+
+
+def refresh_entry_status(entry_ids=None, session=None):
+    """
+    Recompute the entry_status summary rows for the given entry IDs (every entry when None).
+    Runs inside the caller's transaction (db.session unless another session is given, e.g.
+    one bound to a migration's connection), so the caller is responsible for committing.
+    """
+    session = session or db.session
+    is_result_item = InspectionItem.kind.in_(RESULT_KINDS)
+    outstanding = case((is_result_item & InspectionItem.status.in_(["Pending", "Fail"]), InspectionItem.item_name))
+
+    query = session.query(
+        Entry.id.label('entry_id'),
+        func.max(InspectionChecklist.id).label('checklist_id'),
+        func.max(case((InspectionChecklist.approved_to_start == True, 1), else_=0)).label('approved_to_start'),
+        func.max(case((InspectionItem.kind == ItemKind.APPROVAL, InspectionItem.status))).label('approval_status'),
+        func.count(case((is_result_item & (InspectionItem.status == "Fail"), 1))).label('failed_count'),
+        func.count(case((is_result_item & (InspectionItem.status == "Pending"), 1))).label('pending_count'),
+        func.count(case((is_result_item & (InspectionItem.status == "NA"), 1))).label('na_count'),
+        _concat(outstanding, session.get_bind().dialect).label('outstanding_items'),
+        func.max(case((InspectionItem.kind == ItemKind.WEIGHT, InspectionItem.value))).label('vehicle_weight')
+    ).outerjoin(InspectionChecklist, Entry.id == InspectionChecklist.entry_id) \
+     .outerjoin(InspectionItem, InspectionChecklist.id == InspectionItem.checklist_id) \
+     .group_by(Entry.id)
+
+    if entry_ids is not None:
+        entry_ids = [int(entry_id) for entry_id in entry_ids]
+        if not entry_ids:
+            return
+        query = query.filter(Entry.id.in_(entry_ids))
+
+    # Make sure pending ORM changes are visible to the aggregate query
+    session.flush()
+    rows = [
+        {
+            'entry_id': row.entry_id,
+            'checklist_id': row.checklist_id,
+            'approved_to_start': bool(row.approved_to_start),
+            'approval_status': row.approval_status,
+            'failed_count': row.failed_count,
+            'pending_count': row.pending_count,
+            'na_count': row.na_count,
+            'outstanding_items': row.outstanding_items,
+            'vehicle_weight': row.vehicle_weight,
+            'weight_kg': parse_weight(row.vehicle_weight)
+        }
+        for row in query.all()
+    ]
+
+    # Replace the old summary rows in the same transaction
+    delete = db.delete(EntryStatus)
+    if entry_ids is not None:
+        delete = delete.where(EntryStatus.entry_id.in_(entry_ids))
+    session.execute(delete)
+    if rows:
+        session.execute(db.insert(EntryStatus), rows)
+
+    # Mark the rewritten rows with the data version of the commit, for the live report diffs
+    def stamp(connection, version):
+        update = db.update(EntryStatus).values(data_version=version)
+        if entry_ids is not None:
+            update = update.where(EntryStatus.entry_id.in_(entry_ids))
+        connection.execute(update)
+    stamp_with_version(session, stamp)
+
+
+def rebuild_entry_status():
+    """
+    Recreate the whole entry_status table from the raw entries, checklists and items.
+    Returns the number of summary rows written.
+    """
+    EntryStatus.__table__.create(db.engine, checkfirst=True)
+    refresh_entry_status()
+    db.session.commit()
+    return db.session.query(func.count(EntryStatus.entry_id)).scalar()
+
+
+def dashboard_counters():
+    """
+    Every dashboard counter, from one pass over the inspection summary plus the per-class
+    entry totals. Returns the /dashboard_stats JSON body.
+    """
+    counters = db.session.query(
+        func.count(case((EntryStatus.checklist_id == None, 1))).label('missing_inspections'),
+        func.count(case(((EntryStatus.checklist_id != None) & (EntryStatus.approved_to_start == False), 1))).label('not_approved_to_start'),
+        func.count(case((EntryStatus.failed_count > 0, 1))).label('failed_items'),
+        func.count(case((EntryStatus.approval_status == "Fail", 1))).label('denied_start')
+    ).one()
+
+    # Per-class totals for 'W' entries, the overall total is their sum
+    class_counts = db.session.query(Entry.class_type, func.count(Entry.id)) \
+        .filter(Entry.vehicle_type == 'W') \
+        .group_by(Entry.class_type) \
+        .all()
+
+    return {
+        'total_entries': sum(count for _, count in class_counts),
+        'class_entries': [{class_type: count} for class_type, count in class_counts],
+        'missing_inspections_count': counters.missing_inspections,
+        'not_approved_to_start_count': counters.not_approved_to_start,
+        'failed_items_count': counters.failed_items,
+        'denied_start_count': counters.denied_start
+    }
@@ -0,0 +1,79 @@
+import re
+from sqlalchemy import func, select
+from models import db, Entry, EntryStatus
+
+# Percentiles of the weight distribution reported per class
+WEIGHT_PERCENTILES = (10, 25, 50, 75, 90)
+
+
+def _parse_number(value, unit):
+    # The number in '1250', '1,250 kg', '1250.5kg', ... with the unit optional, or None
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = re.fullmatch(rf'\s*(\d+(?:\.\d+)?)\s*(?:{unit}s?)?\s*', str(value or '').replace(',', ''), re.IGNORECASE)
+    return float(match.group(1)) if match else None
+
+
+def parse_weight(value):
+    """
+    Kilograms from a recorded weight such as '1250', '1,250 kg' or '1250.5', or None.
+    """
+    return _parse_number(value, 'kg')
+
+
+def parse_power(value):
+    """
+    Kilowatts from a declared power such as '350' or '350 kW', or None.
+    """
+    return _parse_number(value, 'kw')
+
+
+def _records(frame):
+    # DataFrame rows as JSON-ready dicts, with NaN as None
+    return frame.astype(object).where(frame.notna(), None).to_dict('records')
+
+
+def weight_analytics(class_minimums):
+    """
+    Per-class weight statistics (count, min, max, mean, percentiles, power-to-weight in
+    kW per tonne) and the vehicles weighed under their class minimum, computed column-wise
+    with pandas over one query of the numeric weights. class_minimums maps a normalised
+    class name to its minimum weight in kg.
+    """
+    import pandas as pd  # Only loaded by the analytics endpoint
+
+    query = select(
+        Entry.id.label('entry_id'), Entry.vehicle_number, Entry.driver_name, Entry.class_type,
+        Entry.power_kw, EntryStatus.weight_kg
+    ).join(EntryStatus, Entry.id == EntryStatus.entry_id) \
+     .where(EntryStatus.weight_kg != None)
+    frame = pd.read_sql(query, db.session.connection())
+    unparsed = db.session.query(func.count(EntryStatus.entry_id)) \
+        .filter(EntryStatus.vehicle_weight != None, EntryStatus.weight_kg == None).scalar()
+    if frame.empty:
+        return {'classes': [], 'under_minimum': [], 'unparsed_weights': unparsed}
+
+    frame['class_minimum_kg'] = frame['class_type'].map(class_minimums).astype(float)
+    frame['under_minimum'] = frame['weight_kg'] < frame['class_minimum_kg']  # False without a minimum
+    frame['kw_per_tonne'] = frame['power_kw'].astype(float) / frame['weight_kg'] * 1000
+
+    grouped = frame.fillna({'class_type': ''}).groupby('class_type')
+    weights = grouped['weight_kg']
+    summary = weights.agg(['count', 'min', 'max', 'mean']) \
+        .rename(columns={'min': 'min_kg', 'max': 'max_kg', 'mean': 'mean_kg'})
+    percentiles = weights.quantile([p / 100 for p in WEIGHT_PERCENTILES]).unstack()
+    percentiles.columns = [f'p{p}_kg' for p in WEIGHT_PERCENTILES]
+    summary = summary.join(percentiles).join(grouped.agg(
+        class_minimum_kg=('class_minimum_kg', 'first'),
+        under_minimum_count=('under_minimum', 'sum'),
+        kw_per_tonne_mean=('kw_per_tonne', 'mean'),
+        kw_per_tonne_max=('kw_per_tonne', 'max'),
+    )).round(1).reset_index()
+
+    under = frame.loc[frame['under_minimum'], ['entry_id', 'vehicle_number', 'driver_name', 'class_type',
+                                               'weight_kg', 'class_minimum_kg']]
+    return {
+        'classes': _records(summary),
+        'under_minimum': _records(under.sort_values(['class_type', 'weight_kg'])),
+        'unparsed_weights': unparsed
+    }